@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark for generate_logo renderers.
+
+Compares the original 4x super-sampled pipeline ("supersample") with the
+analytic-corner pipeline ("analytic") for render time per icon and, where
+the `resource` module is available, peak memory. Peak memory is measured in
+a fresh interpreter per renderer/size so the numbers do not contaminate
+each other; the baseline (Python + Pillow imported) is subtracted.
+
+Usage:
+    python scripts/bench_logo.py [--sizes 16 100 256 512] [--repeat 5] [--font path.ttf]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import generate_logo
+
+RENDERERS = {
+    "supersample": "render_logo_supersampled",
+    "analytic": "render_logo",
+}
+
+# Executed in a child process: render once and report the peak RSS before/after in KiB.
+# Linux VmHWM is used when available because ru_maxrss survives fork+exec and
+# would report the parent's high-water mark.
+_MEMORY_PROBE = """
+import resource, sys
+sys.path.insert(0, {scripts_dir!r})
+import generate_logo
+generate_logo._require_pillow()
+
+def peak_kib():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+before = peak_kib()
+render = getattr(generate_logo, {renderer!r})
+render({size}, {size}, "FP", (78, 115, 223, 255), (34, 74, 190, 255), "#FFFFFF", 0.2, 0.5, {font!r})
+print(before, peak_kib())
+"""
+
+
+def render_args(size, font_path):
+    return (size, size, "FP", (78, 115, 223, 255), (34, 74, 190, 255), "#FFFFFF", 0.2, 0.5, font_path)
+
+
+def time_renderer(func_name, size, font_path, repeat):
+    render = getattr(generate_logo, func_name)
+    render(*render_args(size, font_path))  # warm fonts / caches
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(*render_args(size, font_path))
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def peak_memory_kib(func_name, size, font_path):
+    """Peak RSS growth (KiB) caused by one render, or None if unsupported."""
+    try:
+        import resource  # noqa: F401  (POSIX only)
+    except ImportError:
+        return None
+    code = _MEMORY_PROBE.format(scripts_dir=SCRIPTS_DIR, renderer=func_name, size=size, font=font_path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    before, after = (int(v) for v in out.strip().splitlines()[-1].split())
+    return after - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generate_logo renderers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 100, 256, 512])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed renders per case (median is reported)")
+    parser.add_argument("--font", help="TrueType font to use (default: system font discovery)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the per-process peak memory probe")
+    parser.add_argument("--json", help="Write raw results to this file")
+    args = parser.parse_args(argv)
+
+    generate_logo._require_pillow()
+    font_path = args.font or generate_logo.get_system_font_path()
+
+    results = []
+    print(f"{'size':>6} {'renderer':<12} {'time ms':>9} {'peak KiB':>10}")
+    for size in args.sizes:
+        row = {}
+        for label, func_name in RENDERERS.items():
+            kib = None if args.no_memory else peak_memory_kib(func_name, size, font_path)
+            ms = time_renderer(func_name, size, font_path, args.repeat)
+            row[label] = (ms, kib)
+            mem = "n/a" if kib is None else f"{kib:,.0f}"
+            print(f"{size:>6} {label:<12} {ms:>9.2f} {mem:>10}")
+            results.append({"size": size, "renderer": label, "time_ms": round(ms, 3), "peak_kib": kib})
+        (old_ms, old_kib), (new_ms, new_kib) = row["supersample"], row["analytic"]
+        speedup = old_ms / new_ms if new_ms else float("inf")
+        mem_ratio = ""
+        if old_kib and new_kib:
+            mem_ratio = f", memory {old_kib / new_kib:.1f}x lower"
+        print(f"{'':>6} -> {speedup:.1f}x faster{mem_ratio}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"font": font_path, "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the helper scripts.
+
+Runs each entry point with `python -X importtime ... --help` in a fresh
+interpreter, sums the cumulative import time reported on stderr and records
+the wall-clock time of the whole process. Use it to track the cost agents
+pay every time they shell out to a script.
+
+Usage:
+    python scripts/bench_startup.py [--repeat 5] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (label, argv relative to the scripts directory)
+CASES = [
+    ("cli --help", ["forguncy_skill.py", "--help"]),
+    ("cli package --help", ["forguncy_skill.py", "package", "--help"]),
+    ("cli validate --help", ["forguncy_skill.py", "validate", "--help"]),
+    ("cli logo --help", ["forguncy_skill.py", "logo", "--help"]),
+    ("cli mock --help", ["forguncy_skill.py", "mock", "--help"]),
+    ("cli optimize --help", ["forguncy_skill.py", "optimize", "--help"]),
+    ("package_skill.py --help", ["package_skill.py", "--help"]),
+    ("generate_logo.py --help", ["generate_logo.py", "--help"]),
+    ("generate_mock_data.py --help", ["generate_mock_data.py", "--help"]),
+]
+
+
+def parse_importtime(stderr):
+    """
+    Return (total cumulative import time in us, top-level imports sorted by cost).
+    -X importtime lines look like: "import time:   self [us] | cumulative | imported package"
+    """
+    total = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        cumulative = int(parts[1])
+        # Nesting is expressed by extra indentation of the module name
+        if parts[2].startswith("  "):
+            continue
+        name = parts[2].strip()
+        total += cumulative
+        top_level.append((cumulative, name))
+    top_level.sort(reverse=True)
+    return total, top_level
+
+
+def run_case(argv):
+    cmd = [sys.executable, "-X", "importtime"] + argv
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    import_us, top_level = parse_importtime(proc.stderr)
+    return wall, import_us, top_level, proc.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark helper script startup time")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (median is reported)")
+    parser.add_argument("--top", type=int, default=3, help="Show the N most expensive top-level imports")
+    parser.add_argument("--json", help="Write raw results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<32} {'wall ms':>9} {'imports ms':>11}  heaviest imports")
+    for label, case_argv in CASES:
+        walls, imports, top_level, code = [], [], [], 0
+        for _ in range(args.repeat):
+            wall, import_us, top_level, code = run_case(case_argv)
+            walls.append(wall * 1000)
+            imports.append(import_us / 1000)
+        wall_ms = statistics.median(walls)
+        import_ms = statistics.median(imports)
+        heaviest = ", ".join(f"{name} {us / 1000:.1f}" for us, name in top_level[:args.top])
+        status = "" if code == 0 else f" (exit {code})"
+        print(f"{label:<32} {wall_ms:>9.1f} {import_ms:>11.1f}  {heaviest}{status}")
+        results.append({
+            "case": label,
+            "argv": case_argv,
+            "wall_ms": round(wall_ms, 3),
+            "import_ms": round(import_ms, 3),
+            "exit_code": code,
+            "top_imports": [{"module": name, "cumulative_us": us} for us, name in top_level[:args.top]],
+        })
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
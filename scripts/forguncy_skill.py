@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+forguncy-skill - single entry point for the skill helper scripts.
+
+Each subcommand lives in its own script and is imported only when it is
+invoked, so `forguncy-skill --help` (and every subcommand's --help) starts
+without importing Pillow, json schemas or the packaging machinery.
+
+Usage:
+    python scripts/forguncy_skill.py <command> [args...]
+    python scripts/forguncy_skill.py logo --text "FP"
+    python scripts/forguncy_skill.py mock --config mock.json --output data
+    python scripts/forguncy_skill.py <command> --help
+"""
+
+import sys
+
+PROG = "forguncy-skill"
+
+# command -> (module, one-line description)
+# Modules are resolved from this directory on demand; keep this table free of imports.
+COMMANDS = {
+    "package": ("package_skill", "Package a skill into a distributable folder or .skill file"),
+    "patch": ("skill_patch", "Create or apply an incremental upgrade patch (.skillpatch)"),
+    "validate": ("quick_validate", "Validate a skill folder (SKILL.md frontmatter)"),
+    "logo": ("generate_logo", "Generate plugin logo / command icons (requires Pillow)"),
+    "scaffold": ("template_engine", "Render plugin source files from assets/templates"),
+    "lookup": ("symbol_index", "Look up an SDK attribute/class/JS API in the references index"),
+    "mock": ("generate_mock_data", "Generate mock data from a JSON schema config"),
+    "optimize": ("optimize_knowledge", "Optimize the references knowledge base"),
+    "helper": ("skill_helper", "Run or call the long-lived helper server (keeps Pillow/fonts warm)"),
+}
+
+
+def print_usage(stream=sys.stdout):
+    lines = [f"usage: {PROG} <command> [args...]", "", "commands:"]
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, description) in COMMANDS.items():
+        lines.append(f"  {name.ljust(width)}  {description}")
+    lines.append("")
+    lines.append(f"Run '{PROG} <command> --help' for command options.")
+    stream.write("\n".join(lines) + "\n")
+
+
+def load_command(name):
+    """Import the module backing a subcommand and return its main()."""
+    import importlib
+
+    module_name = COMMANDS[name][0]
+    try:
+        module = importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        if e.name != module_name:
+            raise
+        sys.stderr.write(f"Error: '{name}' is not available in this installation ({module_name}.py not found)\n")
+        return None
+    return module.main
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        sys.stderr.write(f"Error: unknown command '{name}'\n\n")
+        print_usage(sys.stderr)
+        return 2
+
+    command_main = load_command(name)
+    if command_main is None:
+        return 1
+
+    # Make argparse report "forguncy-skill <command>" in usage/errors
+    sys.argv[0] = f"{PROG} {name}"
+    result = command_main(rest)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,16 +17,30 @@ import json
 import argparse
 import os
 import platform
+import math
+from functools import lru_cache
 from pathlib import Path
 
-try:
-    from PIL import Image, ImageDraw, ImageFont, ImageColor, ImageFilter
-except ImportError:
-    print("Error: Pillow is required. Please install it via 'pip install Pillow'")
-    sys.exit(1)
+# Pillow is imported lazily (see _require_pillow) so that --help and the
+# shared forguncy-skill CLI start without paying for it.
+Image = ImageDraw = ImageFont = ImageColor = None
 
+# Super-sampling factor for text in the analytic renderer
+TEXT_SUPERSAMPLE = 4
+
+def _require_pillow():
+    """Import Pillow on first use; exit with a hint if it is not installed."""
+    global Image, ImageDraw, ImageFont, ImageColor
+    if Image is None:
+        try:
+            from PIL import Image, ImageDraw, ImageFont, ImageColor
+        except ImportError:
+            print("Error: Pillow is required. Please install it via 'pip install Pillow'")
+            sys.exit(1)
+
+@lru_cache(maxsize=None)
 def get_system_font_path():
-    """Try to find a good sans-serif font on the system."""
+    """Try to find a good sans-serif font on the system (cached per process)."""
     system = platform.system()
     if system == "Windows":
         fonts = ["arialbd.ttf", "arial.ttf", "msyhbd.ttc", "msyh.ttc", "seguiemj.ttf"]
@@ -52,6 +66,11 @@ def get_system_font_path():
     
     return None
 
+@lru_cache(maxsize=64)
+def load_font(font_path, font_size):
+    """Load a TrueType font. Cached so batch runs and the helper server parse each face once."""
+    return ImageFont.truetype(font_path, font_size)
+
 def hex_to_rgb(hex_color):
     """Convert hex color string to RGB tuple."""
     if hex_color.startswith('#'):
@@ -76,40 +95,59 @@ def create_gradient(width, height, start_color, end_color, direction='vertical')
     base.paste(top, (0, 0), mask)
     return base
 
-def generate_logo(config):
+def corner_alpha_mask(width, height, radius):
     """
-    Generate a logo based on the provided configuration.
-    
-    Config Schema:
-    {
-        "output_path": str,         # Path to save the file
-        "size": [width, height],    # Output size, e.g., [100, 100]
-        "text": str,                # Text to display, e.g., "FP"
-        "font_size_ratio": float,   # Font size relative to height, default 0.5
-        "font_path": str,           # Optional path to .ttf file
-        "bg_color_start": str,      # Gradient start hex, e.g., "#4E73DF"
-        "bg_color_end": str,        # Gradient end hex, e.g., "#224ABE"
-        "text_color": str,          # Text color hex, default "#FFFFFF"
-        "border_radius_ratio": float, # Corner radius relative to size, default 0.2
-        "padding_ratio": float      # Padding for content, default 0.1
-    }
+    Build the alpha channel of a rounded rectangle at the target size.
+
+    Coverage is computed analytically from the signed distance of each pixel
+    centre to the corner arc (clamped to [0, 1] over one pixel), so the
+    background needs no super-sampling. Only the four corner squares are
+    computed; the rest of the mask is a solid fill.
     """
-    # 1. Parse Config & Defaults
-    width, height = config.get("size", [100, 100])
-    output_path = config.get("output_path", "logo.png")
-    text = config.get("text", "FP")
-    bg_start = config.get("bg_color_start", "#4E73DF")
-    bg_end = config.get("bg_color_end", "#224ABE")
-    text_color = config.get("text_color", "#FFFFFF")
-    radius_ratio = config.get("border_radius_ratio", 0.2)
-    font_ratio = config.get("font_size_ratio", 0.5)
-    
-    # 2. Setup High-Res Canvas (Antialiasing)
-    scale = 4 # Super-sampling factor
-    w, h = width * scale, height * scale
-    
-    # 3. Create Background
-    # Draw gradient
+    mask = Image.new('L', (width, height), 255)
+    radius = min(radius, width / 2, height / 2)
+    n = int(math.ceil(radius))
+    if n <= 0:
+        return mask
+
+    data = bytearray(n * n)
+    for j in range(n):
+        dy = max(radius - (j + 0.5), 0.0)
+        row = j * n
+        for i in range(n):
+            dx = max(radius - (i + 0.5), 0.0)
+            coverage = 0.5 - (math.hypot(dx, dy) - radius)
+            data[row + i] = 255 if coverage >= 1 else (0 if coverage <= 0 else int(coverage * 255 + 0.5))
+
+    corner = Image.frombytes('L', (n, n), bytes(data))
+    mask.paste(corner, (0, 0))
+    mask.paste(corner.transpose(Image.Transpose.FLIP_LEFT_RIGHT), (width - n, 0))
+    mask.paste(corner.transpose(Image.Transpose.FLIP_TOP_BOTTOM), (0, height - n))
+    mask.paste(corner.transpose(Image.Transpose.ROTATE_180), (width - n, height - n))
+    return mask
+
+def render_gradient(width, height, start_color, end_color, alpha, direction='vertical'):
+    """
+    Render a two-colour gradient straight into an RGBA image.
+
+    A single row/column of interpolation weights is stretched to the full
+    size and mapped through per-channel lookup tables, so no per-pixel Python
+    work and no intermediate colour canvases are needed.
+    """
+    length = height if direction == 'vertical' else width
+    ramp = bytes(min(255, int(255 * (k + 0.5) / length)) for k in range(length))
+    if direction == 'vertical':
+        weights = Image.frombytes('L', (1, height), ramp).resize((width, height), Image.Resampling.NEAREST)
+    else:
+        weights = Image.frombytes('L', (width, 1), ramp).resize((width, height), Image.Resampling.NEAREST)
+
+    bands = []
+    for c in range(3):
+        a, b = start_color[c], end_color[c]
+        bands.append(weights.point([int(a + (b - a) * v / 255 + 0.5) for v in range(256)]))
+    return Image.merge('RGBA', bands + [alpha])
+
+def _parse_gradient_colors(bg_start, bg_end):
     try:
         c1 = hex_to_rgb(bg_start)
         c2 = hex_to_rgb(bg_end)
@@ -120,7 +158,42 @@ def generate_logo(config):
         print(f"Color parsing error: {e}. Using blue default.")
         c1 = (78, 115, 223, 255)
         c2 = (34, 74, 190, 255)
+    return c1, c2
 
+def _fit_font(text, font_path, font_size, max_width):
+    """
+    Load the font and shrink it until the text fits max_width.
+    Returns (font, bbox, font_path, font_size) with the path/size actually used.
+    """
+    try:
+        if font_path:
+            font = load_font(font_path, font_size)
+        else:
+            # Fallback to default (ugly but works)
+            print("Warning: No system font found, using default.")
+            font = ImageFont.load_default()
+    except Exception as e:
+        print(f"Font loading error: {e}. Using default.")
+        font_path = None
+        font = ImageFont.load_default()
+
+    # getbbox returns (left, top, right, bottom)
+    bbox = font.getbbox(text)
+
+    # Auto-fit logic: If text is too wide, reduce font size
+    while bbox[2] - bbox[0] > max_width and font_size > 5:
+        font_size -= 4 # Decrease step (in scale=4 coordinates, this is 1px)
+        font = load_font(font_path, font_size) if font_path else ImageFont.load_default()
+        bbox = font.getbbox(text)
+    return font, bbox, font_path, font_size
+
+def render_logo_supersampled(width, height, text, c1, c2, text_color, radius_ratio, font_ratio, font_path):
+    """Original pipeline: draw everything on a 4x RGBA canvas, then downsample."""
+    # 2. Setup High-Res Canvas (Antialiasing)
+    scale = 4 # Super-sampling factor
+    w, h = width * scale, height * scale
+    
+    # 3. Create Background
     img = create_gradient(w, h, c1, c2)
     
     # 4. Apply Rounded Corners Mask
@@ -137,48 +210,115 @@ def generate_logo(config):
 
     # 5. Draw Text
     if text:
-        font_path = config.get("font_path")
-        if not font_path:
-            font_path = get_system_font_path()
-            
-        font_size = int(h * font_ratio)
-        
-        try:
-            if font_path:
-                font = ImageFont.truetype(font_path, font_size)
-            else:
-                # Fallback to default (ugly but works)
-                print("Warning: No system font found, using default.")
-                font = ImageFont.load_default()
-        except Exception as e:
-            print(f"Font loading error: {e}. Using default.")
-            font = ImageFont.load_default()
-
-        # Center text
-        # getbbox returns (left, top, right, bottom)
-        left, top, right, bottom = font.getbbox(text)
-        text_w = right - left
-        text_h = bottom - top
-        
-        # Auto-fit logic: If text is too wide, reduce font size
-        max_width = w * 0.9 # Leave 10% padding
-        if text_w > max_width:
-             while text_w > max_width and font_size > 5:
-                 font_size -= 4 # Decrease step (in scale=4 coordinates, this is 1px)
-                 font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default()
-                 left, top, right, bottom = font.getbbox(text)
-                 text_w = right - left
-                 text_h = bottom - top
+        font, (left, top, right, bottom), _, _ = _fit_font(text, font_path, int(h * font_ratio), w * 0.9)
 
         # Adjust position to center
         # Note: text rendering often needs visual adjustment, especially vertically
-        x = (w - text_w) / 2 - left
-        y = (h - text_h) / 2 - top
+        x = (w - (right - left)) / 2 - left
+        y = (h - (bottom - top)) / 2 - top
         
         draw.text((x, y), text, font=font, fill=text_color)
 
     # 6. Downsample to target size
-    final_img = img.resize((width, height), resample=Image.Resampling.LANCZOS)
+    return img.resize((width, height), resample=Image.Resampling.LANCZOS)
+
+def render_logo(width, height, text, c1, c2, text_color, radius_ratio, font_ratio, font_path, glyph_cache=None):
+    """
+    Lean pipeline: the gradient is rendered directly into the final RGBA
+    buffer at the target size with analytic corner alpha; only the text is
+    super-sampled, and only within its own bounding box. The super-sampled
+    text mask comes from glyph_cache when given and is tinted at paste time.
+    """
+    scale = TEXT_SUPERSAMPLE
+    radius = min(width, height) * radius_ratio
+    img = render_gradient(width, height, c1, c2, corner_alpha_mask(width, height, radius))
+
+    if text:
+        w, h = width * scale, height * scale
+        font, (left, top, right, bottom), font_path, font_size = _fit_font(
+            text, font_path, int(h * font_ratio), w * 0.9)
+
+        # Same centring as the super-sampled path, in scaled coordinates
+        x = (w - (right - left)) / 2 - left
+        y = (h - (bottom - top)) / 2 - top
+
+        # Text layer covers the ink box (plus filter support) on a pixel-aligned grid
+        pad = 3
+        x0 = max(0, int(math.floor((x + left) / scale)) - pad)
+        y0 = max(0, int(math.floor((y + top) / scale)) - pad)
+        x1 = min(width, int(math.ceil((x + right) / scale)) + pad)
+        y1 = min(height, int(math.ceil((y + bottom) / scale)) + pad)
+        if x1 > x0 and y1 > y0:
+            if glyph_cache is not None:
+                text_layer = glyph_cache.get(font, font_path, font_size, text)
+            else:
+                text_layer = glyph_cache_module().render_text_layer(font, text)
+            layer = Image.new('L', ((x1 - x0) * scale, (y1 - y0) * scale), 0)
+            # Ink box origin in layer coordinates (snapped to the super-sampled grid)
+            layer.paste(text_layer.mask, (int(round(x + left)) - x0 * scale, int(round(y + top)) - y0 * scale))
+            coverage = layer.resize((x1 - x0, y1 - y0), resample=Image.Resampling.LANCZOS)
+            img.paste(ImageColor.getcolor(text_color, 'RGBA'), (x0, y0, x1, y1), coverage)
+
+    return img
+
+def glyph_cache_module():
+    import glyph_cache
+    return glyph_cache
+
+_default_glyph_cache = None
+
+def default_glyph_cache():
+    """Process-wide in-memory text-layer cache (shared by config lists and the helper server)."""
+    global _default_glyph_cache
+    if _default_glyph_cache is None:
+        _default_glyph_cache = glyph_cache_module().GlyphCache()
+    return _default_glyph_cache
+
+def generate_logo(config, glyph_cache=None):
+    """
+    Generate a logo based on the provided configuration.
+    glyph_cache: GlyphCache to reuse rendered text layers; defaults to a
+    process-wide in-memory cache.
+    
+    Config Schema:
+    {
+        "output_path": str,         # Path to save the file
+        "size": [width, height],    # Output size, e.g., [100, 100]
+        "text": str,                # Text to display, e.g., "FP"
+        "font_size_ratio": float,   # Font size relative to height, default 0.5
+        "font_path": str,           # Optional path to .ttf file
+        "bg_color_start": str,      # Gradient start hex, e.g., "#4E73DF"
+        "bg_color_end": str,        # Gradient end hex, e.g., "#224ABE"
+        "text_color": str,          # Text color hex, default "#FFFFFF"
+        "border_radius_ratio": float, # Corner radius relative to size, default 0.2
+        "padding_ratio": float,     # Padding for content, default 0.1
+        "renderer": str             # "analytic" (default) or "supersample" (original 4x pipeline)
+    }
+    """
+    _require_pillow()
+
+    # 1. Parse Config & Defaults
+    width, height = config.get("size", [100, 100])
+    output_path = config.get("output_path", "logo.png")
+    text = config.get("text", "FP")
+    bg_start = config.get("bg_color_start", "#4E73DF")
+    bg_end = config.get("bg_color_end", "#224ABE")
+    text_color = config.get("text_color", "#FFFFFF")
+    radius_ratio = config.get("border_radius_ratio", 0.2)
+    font_ratio = config.get("font_size_ratio", 0.5)
+    renderer = config.get("renderer", "analytic")
+
+    c1, c2 = _parse_gradient_colors(bg_start, bg_end)
+    font_path = None
+    if text:
+        font_path = config.get("font_path") or get_system_font_path()
+
+    # 2-6. Render
+    if renderer == "supersample":
+        final_img = render_logo_supersampled(width, height, text, c1, c2, text_color, radius_ratio, font_ratio, font_path)
+    else:
+        final_img = render_logo(width, height, text, c1, c2, text_color, radius_ratio, font_ratio, font_path,
+                                glyph_cache if glyph_cache is not None else default_glyph_cache())
     
     # 7. Save
     output_dir = os.path.dirname(output_path)
@@ -186,19 +326,29 @@ def generate_logo(config):
         os.makedirs(output_dir, exist_ok=True)
     final_img.save(output_path, "PNG")
     print(f"Generated: {output_path} ({width}x{height})")
+    return output_path
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Generate Logos for Forguncy Plugin")
     parser.add_argument("--config", help="Path to JSON config file")
     parser.add_argument("--text", help="Text to display on logo")
     parser.add_argument("--bg-start", help="Gradient start color (hex)")
     parser.add_argument("--bg-end", help="Gradient end color (hex)")
+    parser.add_argument("--glyph-cache", metavar="DIR", help="Persist rendered text layers in this directory across runs")
+    parser.add_argument("--derive-glyph-sizes", action="store_true",
+                        help="Resample cached text layers for smaller sizes (faster, not pixel-exact)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Debug: Print received arguments to help troubleshoot shell parsing issues
     print(f"DEBUG: Arguments received: {args}")
+
+    # Shared text-layer cache: persisted to disk only when --glyph-cache is given
+    glyph_cache = None
+    if args.glyph_cache or args.derive_glyph_sizes:
+        glyph_cache = glyph_cache_module().GlyphCache(disk_dir=args.glyph_cache,
+                                                      derive_sizes=args.derive_glyph_sizes)
     
     # Base configuration for Plugin Logo (100x100)
     plugin_logo_config = {
@@ -232,7 +382,8 @@ def main():
             # If user provides a list of configs, process all
             if isinstance(user_config, list):
                 for cfg in user_config:
-                    generate_logo(cfg)
+                    generate_logo(cfg, glyph_cache)
+                print_glyph_cache_stats(glyph_cache)
                 return
             else:
                 # Single config override
@@ -258,10 +409,16 @@ def main():
 
     # Generate both
     print("Generating PluginLogo.png (100x100)...")
-    generate_logo(plugin_logo_config)
+    generate_logo(plugin_logo_config, glyph_cache)
     
     print("Generating CommandIcon.png (16x16)...")
-    generate_logo(command_icon_config)
+    generate_logo(command_icon_config, glyph_cache)
+    print_glyph_cache_stats(glyph_cache)
+
+def print_glyph_cache_stats(glyph_cache):
+    if glyph_cache is not None:
+        stats = ", ".join(f"{k}={v}" for k, v in glyph_cache.stats.items())
+        print(f"Glyph cache: {stats}")
 
 if __name__ == "__main__":
     main()
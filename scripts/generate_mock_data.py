@@ -1,100 +1,767 @@
 import json
+import math
 import random
-import uuid
+import re
 import argparse
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import repeat
+from statistics import NormalDist
 
-def generate_value(field_type, index):
+import instrumentation as inst
+from skill_files import atomic_write
+
+# Resolution of the precomputed inverse-CDF table used for normal values
+# (covers roughly +/-3.7 standard deviations, linearly interpolated between points)
+NORMAL_TABLE_SIZE = 4096
+# Largest Zipf rank count; the alias table holds one entry per rank
+MAX_ZIPF_RANKS = 1_000_000
+# Records generated per batch (bounds memory for large counts)
+BATCH_SIZE = 10_000
+
+# Field types (schema values):
+# - uuid: Generates a UUID string.
+# - string:prefix_{index}: Generates a string with prefix and index.
+# - int:min,max: Random integer between min and max.
+# - normal:mean,stddev[,min,max]: Normally distributed number, clamped to [min, max];
+#   rounded to the precision written in mean ("100" -> integers, "99.50" -> 2 decimals).
+# - zipf:n[,s]: Integer rank 1..n with P(k) proportional to 1/k^s (s defaults to 1).
+# - date:today/future_Xd/past_Xd: Date string (YYYY-MM-DD). Ranges combine with "|"
+#   (date:past_30d|today|future_60d).
+# - datetime:today/future_Xd/past_Xd[,HH:MM-HH:MM]: "YYYY-MM-DD HH:MM:SS", optionally
+#   restricted to a time-of-day window (e.g. working hours 09:00-18:00).
+# - enum:val1,val2,val3: Uniform pick. enum:Open=6,Closed=3,Blocked=1: weighted pick.
+# - bool: Random boolean. bool:0.3: True with probability 0.3.
+# - Anything else is returned as a literal.
+#
+# A field may also be an object:
+# - {"type": "<field type>"}
+# - A correlated field, whose distribution depends on an earlier generated field:
+#   {
+#     "depends_on": "DueDate",
+#     "cases": [
+#       {"when": "< today", "type": "enum:Overdue=3,Completed=7"},
+#       {"when": ">= today", "type": "enum:Pending=6,In Progress=4"}
+#     ],
+#     "default": "enum:Pending"
+#   }
+#   "when" is "<op> <operand>" (op: <, <=, >, >=, ==, !=; operand: a number, "today" or a
+#   literal), a plain value (equality) or a list of values (membership).
+
+
+# ---------------------------------------------------------------------------
+# Precomputed samplers. Each draws a whole column at once: sample(n, start, source)
+# returns n values for record indexes start.. (source: the depends_on column).
+# Samplers whose values depend on the record index also provide sample_at(indexes).
+# ---------------------------------------------------------------------------
+
+def value_type(values):
+    """SQL column type for a set of sample values: INTEGER, REAL or TEXT."""
+    if all(isinstance(v, int) for v in values):
+        return "INTEGER"  # bool is an int subclass
+    if all(isinstance(v, (int, float)) for v in values):
+        return "REAL"
+    return "TEXT"
+
+
+def build_alias_table(weights):
     """
-    Generates a random value based on the field type definition.
-    Supported types:
-    - uuid: Generates a UUID string.
-    - string:prefix_{index}: Generates a string with prefix and index.
-    - int:min,max: Generates a random integer between min and max.
-    - date:today/future_Xd/past_Xd: Generates a date string (YYYY-MM-DD).
-    - enum:val1,val2,val3: Picks a random value from the list.
-    - bool: Generates a random boolean.
+    Vose's alias method: returns (prob, alias) so that one uniform draw picks
+    index i with probability weights[i] / sum(weights) in O(1).
     """
+    n = len(weights)
+    total = float(sum(weights))
+    if n == 0 or total <= 0 or any(w < 0 for w in weights):
+        raise ValueError("weights must be non-negative with a positive sum")
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class AliasSampler:
+    """Weighted choice among values; one random() per draw via the alias table."""
+
+    def __init__(self, values, weights, rng):
+        prob, alias = build_alias_table(weights)
+        self.k = len(values)
+        # x = random() * k picks column i = int(x); keep values[i] if x < i + prob[i]
+        self.thresholds = [i + p for i, p in enumerate(prob)]
+        self.values = list(values)
+        self.alias_values = [values[a] for a in alias]
+        self.sql_type = value_type(self.values)
+        self.rng = rng
+
+    def sample(self, n, start=1, source=None):
+        rnd, k = self.rng.random, self.k
+        thresholds, values, alias_values = self.thresholds, self.values, self.alias_values
+        xs = [rnd() * k for _ in repeat(None, n)]
+        return [values[i] if x < thresholds[i] else alias_values[i] for x, i in zip(xs, map(int, xs))]
+
+
+class TableSampler:
+    """Uniform pick from a precomputed table of values."""
+
+    def __init__(self, table, rng):
+        self.table = list(table)
+        self.sql_type = value_type(self.table)
+        self.rng = rng
+
+    def sample(self, n, start=1, source=None):
+        rnd, table, k = self.rng.random, self.table, len(self.table)
+        return [table[int(rnd() * k)] for _ in repeat(None, n)]
+
+
+class IntRangeSampler:
+    sql_type = "INTEGER"
+
+    def __init__(self, low, high, rng):
+        self.low, self.span = low, high - low + 1
+        self.rng = rng
+
+    def sample(self, n, start=1, source=None):
+        rnd, low, span = self.rng.random, self.low, self.span
+        return [low + int(rnd() * span) for _ in repeat(None, n)]
+
+
+class NormalSampler:
+    """Inverse-CDF table with linear interpolation: one random() per value."""
+
+    def __init__(self, mean, stddev, low, high, decimals, rng):
+        if stddev <= 0:
+            raise ValueError("normal stddev must be positive")
+        dist = NormalDist(mean, stddev)
+        size = NORMAL_TABLE_SIZE
+        self.table = [dist.inv_cdf((j + 0.5) / size) for j in range(size)]
+        self.deltas = [b - a for a, b in zip(self.table, self.table[1:])] + [0.0]
+        self.low = -math.inf if low is None else low
+        self.high = math.inf if high is None else high
+        self.decimals = decimals
+        self.sql_type = "INTEGER" if decimals == 0 else "REAL"
+        self.rng = rng
+
+    def sample(self, n, start=1, source=None):
+        rnd, table, deltas, span = self.rng.random, self.table, self.deltas, len(self.table) - 1
+        xs = [rnd() * span for _ in repeat(None, n)]
+        values = [table[i] + (x - i) * deltas[i] for x, i in zip(xs, map(int, xs))]
+        low, high = self.low, self.high
+        if low != -math.inf or high != math.inf:
+            values = [low if v < low else high if v > high else v for v in values]
+        if self.decimals == 0:
+            return [int(round(v)) for v in values]
+        return [round(v, self.decimals) for v in values]
+
+
+class DateTimeSampler:
+    """Precomputed day strings combined with a precomputed time-of-day window."""
+
+    sql_type = "TEXT"
+
+    def __init__(self, days, window, rng):
+        self.days = days
+        start, end = window
+        self.minute_base = start // 60
+        self.minutes = [f"{m // 60:02d}:{m % 60:02d}:" for m in range(start // 60, (end + 59) // 60)]
+        self.seconds = [f"{s:02d}" for s in range(60)]
+        self.start, self.span = start, end - start
+        self.rng = rng
+
+    def sample(self, n, start=1, source=None):
+        rnd, days, nd = self.rng.random, self.days, len(self.days)
+        minutes, seconds, base = self.minutes, self.seconds, self.minute_base
+        t0, span = self.start, self.span
+        result = []
+        append = result.append
+        for _ in repeat(None, n):
+            t = t0 + int(rnd() * span)
+            append(f"{days[int(rnd() * nd)]} {minutes[t // 60 - base]}{seconds[t % 60]}")
+        return result
+
+
+class UuidSampler:
+    """Version-4 UUID strings from the (seedable) generator's random bits."""
+
+    sql_type = "TEXT"
+
+    # Clear the version/variant bits, then set version 4 and the RFC 4122 variant
+    MASK = ~((0xF << 76) | (0x3 << 62)) & ((1 << 128) - 1)
+    BITS = (0x4 << 76) | (0x2 << 62)
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def sample(self, n, start=1, source=None):
+        bits, mask, set_bits = self.rng.getrandbits, self.MASK, self.BITS
+        result = []
+        append = result.append
+        for _ in repeat(None, n):
+            h = f"{bits(128) & mask | set_bits:032x}"
+            append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+        return result
+
+
+class FunctionSampler:
+    """Values that are not random draws (index templates, literals)."""
+
+    def __init__(self, func):
+        self.func = func
+        self.sql_type = value_type([func(1)])
+
+    def sample(self, n, start=1, source=None):
+        return self.sample_at(range(start, start + n))
+
+    def sample_at(self, indexes):
+        func = self.func
+        return [func(i) for i in indexes]
+
+
+class CorrelatedSampler:
+    """
+    Picks a case per record from the depends_on value, then draws each case's
+    values in one batch and scatters them back into record order.
+    """
+
+    def __init__(self, depends_on, cases, default):
+        self.depends_on = depends_on
+        self.cases = cases        # [(predicate, sampler)]
+        self.default = default    # sampler or None (-> None values)
+        types = {s.sql_type for s in [sampler for _, sampler in cases] + [default] if s is not None}
+        # Mixed cases get no declared type (SQLite stores each value as-is)
+        self.sql_type = types.pop() if len(types) == 1 else ""
+
+    def sample(self, n, start=1, source=None):
+        groups = [[] for _ in range(len(self.cases) + 1)]
+        predicates = [p for p, _ in self.cases]
+        fallback = len(self.cases)
+        for row, value in enumerate(source):
+            for case, predicate in enumerate(predicates):
+                if predicate(value):
+                    groups[case].append(row)
+                    break
+            else:
+                groups[fallback].append(row)
+
+        result = [None] * n
+        samplers = [s for _, s in self.cases] + [self.default]
+        for rows, sampler in zip(groups, samplers):
+            if rows and sampler is not None:
+                if hasattr(sampler, "sample_at"):
+                    # Index templates such as string:X-{index} number by record, not by case
+                    values = sampler.sample_at([start + row for row in rows])
+                else:
+                    values = sampler.sample(len(rows), start)
+                for row, value in zip(rows, values):
+                    result[row] = value
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Compiling field definitions
+# ---------------------------------------------------------------------------
+
+def _day_offsets(mode, field_type):
+    offsets = []
+    # "past_30d|today|future_60d": uniform over the union of the ranges
+    for part in mode.split("|"):
+        m = re.fullmatch(r'(future|past)_(\d+)d', part.strip())
+        if not m:
+            # "today" (and, as before, any unrecognised mode)
+            offsets.append(0)
+            continue
+        days = int(m.group(2))
+        if days < 1:
+            raise ValueError(f"date range must be at least 1 day in '{field_type}'")
+        sign = 1 if m.group(1) == "future" else -1
+        offsets.extend(sign * d for d in range(1, days + 1))
+    return sorted(set(offsets))
+
+
+def _day_strings(mode, field_type):
+    today = datetime.now()
+    return [(today + timedelta(days=d)).strftime("%Y-%m-%d") for d in _day_offsets(mode, field_type)]
+
+
+def _parse_window(text, field_type):
+    m = re.fullmatch(r'(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})', text.strip())
+    if not m:
+        raise ValueError(f"time window must look like 09:00-18:00 in '{field_type}'")
+    start = int(m.group(1)) * 3600 + int(m.group(2)) * 60
+    end = int(m.group(3)) * 3600 + int(m.group(4)) * 60
+    if not 0 <= start < end <= 24 * 3600:
+        raise ValueError(f"invalid time window in '{field_type}'")
+    return start, end
+
+
+def _decimals(text):
+    return len(text.split(".", 1)[1]) if "." in text else 0
+
+
+def compile_field(field, rng=random):
+    """Turn one schema value into a sampler with its tables precomputed."""
+    if isinstance(field, dict):
+        if "depends_on" in field:
+            cases = [(compile_condition(case.get("when")), compile_field(case["type"], rng))
+                     for case in field.get("cases", [])]
+            default = compile_field(field["default"], rng) if "default" in field else None
+            return CorrelatedSampler(field["depends_on"], cases, default)
+        return compile_field(field["type"], rng)
+
+    field_type = str(field)
+    kind, sep, args = field_type.partition(":")
+
     if field_type == "uuid":
-        return str(uuid.uuid4())
-    
-    if field_type.startswith("string:"):
-        template = field_type.split(":", 1)[1]
-        return template.replace("{index}", str(index))
-    
-    if field_type.startswith("int:"):
+        return UuidSampler(rng)
+
+    if kind == "string" and sep:
+        return FunctionSampler(lambda i: args.replace("{index}", str(i)))
+
+    if kind == "int" and sep:
         try:
-            range_str = field_type.split(":", 1)[1]
-            min_val, max_val = map(int, range_str.split(","))
-            return random.randint(min_val, max_val)
+            low, high = map(int, args.split(","))
         except ValueError:
-            return 0
+            low = high = None
+        if low is None or high < low:
+            # Malformed or empty ranges have always produced 0
+            return FunctionSampler(lambda i: 0)
+        return IntRangeSampler(low, high, rng)
+
+    if kind == "normal" and args:
+        parts = [p.strip() for p in args.split(",")]
+        if len(parts) not in (2, 4):
+            raise ValueError(f"expected normal:mean,stddev[,min,max], got '{field_type}'")
+        mean, stddev = float(parts[0]), float(parts[1])
+        low, high = (float(parts[2]), float(parts[3])) if len(parts) == 4 else (None, None)
+        return NormalSampler(mean, stddev, low, high, _decimals(parts[0]), rng)
+
+    if kind == "zipf" and args:
+        parts = args.split(",")
+        n = int(parts[0])
+        s = float(parts[1]) if len(parts) > 1 else 1.0
+        if not 1 <= n <= MAX_ZIPF_RANKS:
+            raise ValueError(f"zipf rank count must be between 1 and {MAX_ZIPF_RANKS}, got '{field_type}'")
+        return AliasSampler(list(range(1, n + 1)), [k ** -s for k in range(1, n + 1)], rng)
+
+    if kind == "date" and sep:
+        return TableSampler(_day_strings(args, field_type), rng)
+
+    if kind == "datetime" and args:
+        mode, _, window = args.partition(",")
+        return DateTimeSampler(_day_strings(mode.strip(), field_type),
+                               _parse_window(window, field_type) if window else (0, 24 * 3600), rng)
+
+    if kind == "enum" and sep:
+        options = args.split(",")
+        if any(re.search(r'=\s*\d+(\.\d+)?\s*$', o) for o in options):
+            values, weights = [], []
+            for option in options:
+                value, sep, weight = option.rpartition("=")
+                if not sep:
+                    value, weight = option, "1"
+                values.append(value)
+                weights.append(float(weight))
+            return AliasSampler(values, weights, rng)
+        return TableSampler(options, rng)
+
+    if kind == "bool":
+        if args:
+            p = float(args)
+            return AliasSampler([True, False], [p, 1.0 - p], rng)
+        return TableSampler([True, False], rng)
+
+    return FunctionSampler(lambda i: field_type)  # Return literal if no match
+
+
+_OPERATORS = {
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b, "!=": lambda a, b: a != b,
+}
+
+
+def compile_condition(when):
+    """Predicate for a correlated case's "when"; None matches everything."""
+    if when is None:
+        return lambda value: True
+    if isinstance(when, list):
+        allowed = set(when)
+        return lambda value: value in allowed
+    if not isinstance(when, str):
+        return lambda value: value == when
+    m = re.fullmatch(r'\s*(<=|>=|==|!=|<|>)\s*(.+?)\s*', when)
+    if not m:
+        return lambda value: value == when
+    op, operand = _OPERATORS[m.group(1)], m.group(2)
+    if operand == "today":
+        # ISO dates/datetimes compare correctly as strings
+        today = datetime.now().strftime("%Y-%m-%d")
+        if m.group(1) in ("<=", ">"):
+            # "<= today" must include datetimes later today
+            today += " 99"
+        return lambda value: value is not None and op(str(value), today)
+    try:
+        number = float(operand)
+    except ValueError:
+        return lambda value: value is not None and op(str(value), operand)
+    return lambda value: isinstance(value, (int, float)) and op(value, number)
+
+
+def compile_schema(schema, rng=random):
+    """
+    Compile a schema dict into [(key, sampler)] in generation order
+    (fields come after the fields they depend on).
+    """
+    compiled = {}
+    for key, field in schema.items():
+        try:
+            compiled[key] = compile_field(field, rng)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"field '{key}': {e}") from None
+
+    ordered, state = [], {}
+
+    def visit(key, path):
+        if state.get(key) == "done":
+            return
+        if state.get(key) == "visiting":
+            raise ValueError(f"circular depends_on: {' -> '.join(path + [key])}")
+        state[key] = "visiting"
+        depends_on = getattr(compiled[key], "depends_on", None)
+        if depends_on is not None:
+            if depends_on not in compiled:
+                raise ValueError(f"field '{key}' depends on unknown field '{depends_on}'")
+            visit(depends_on, path + [key])
+        state[key] = "done"
+        ordered.append((key, compiled[key]))
+
+    for key in compiled:
+        visit(key, [])
+    return ordered
+
+
+def generate_rows(columns, keys, count, batch_size=BATCH_SIZE):
+    """
+    Yield lists of row tuples (values in keys order), batch_size rows at a time.
+    columns is the output of compile_schema().
+    """
+    for start in range(1, count + 1, batch_size):
+        n = min(batch_size, count - start + 1)
+        values = {}
+        for key, sampler in columns:
+            depends_on = getattr(sampler, "depends_on", None)
+            values[key] = sampler.sample(n, start, values[depends_on] if depends_on else None)
+        yield list(zip(*(values[k] for k in keys)))
+
 
-    if field_type.startswith("date:"):
-        mode = field_type.split(":", 1)[1]
-        today = datetime.now()
-        if mode == "today":
-            return today.strftime("%Y-%m-%d")
-        elif mode.startswith("future_"):
-            days = int(mode.split("_")[1][:-1])
-            return (today + timedelta(days=random.randint(1, days))).strftime("%Y-%m-%d")
-        elif mode.startswith("past_"):
-            days = int(mode.split("_")[1][:-1])
-            return (today - timedelta(days=random.randint(1, days))).strftime("%Y-%m-%d")
-        return today.strftime("%Y-%m-%d")
+def generate_batches(schema, count, rng=random, batch_size=BATCH_SIZE):
+    """Yield lists of records (dicts in schema key order), batch_size at a time."""
+    keys = list(schema)
+    for rows in generate_rows(compile_schema(schema, rng), keys, count, batch_size):
+        yield [dict(zip(keys, row)) for row in rows]
 
-    if field_type.startswith("enum:"):
-        options = field_type.split(":", 1)[1].split(",")
-        return random.choice(options)
 
-    if field_type == "bool":
-        return random.choice([True, False])
+@lru_cache(maxsize=256)
+def _cached_field(field_type, day):
+    # day only keys the cache: date tables and "today" conditions are relative to it
+    return compile_field(field_type)
 
-    return field_type  # Return literal if no match
 
-def generate_data(config_path, output_dir):
+def generate_value(field_type, index):
+    """
+    Generates a random value based on the field type definition
+    (see the field types above). Compiled tables are cached per type string
+    and day, so long-lived processes pick up the new date after midnight.
+    """
+    return _cached_field(field_type, datetime.now().strftime("%Y-%m-%d")).sample(1, index)[0]
+
+# ---------------------------------------------------------------------------
+# Sinks: where generated rows go
+# ---------------------------------------------------------------------------
+
+class Sink:
     """
-    Reads the config file and generates mock data files in the output directory.
+    Destination for generated rows. For each config output the generator calls
+    begin(item, columns) once, write(rows) for every batch (rows are tuples in
+    column order), then end(), which returns the written path; abort() is called
+    instead of end() when generation or writing fails. close() runs once at the end.
+
+    columns is a list of (name, sql_type) with sql_type INTEGER, REAL, TEXT or "".
+    New sinks subclass this and register themselves in SINKS.
     """
+
+    # Rows generated per batch (and per write() call)
+    batch_size = BATCH_SIZE
+
+    def begin(self, item, columns):
+        raise NotImplementedError
+
+    def write(self, rows):
+        raise NotImplementedError
+
+    def end(self):
+        raise NotImplementedError
+
+    def abort(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonSink(Sink):
+    """One JSON array file per output, streamed batch by batch and renamed into place."""
+
+    def __init__(self, output_dir, batch_size=BATCH_SIZE):
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.writer = None
+
+    def begin(self, item, columns):
+        self.path = os.path.join(self.output_dir, item.get("filename", "output.json"))
+        self.keys = [name for name, _ in columns]
+        # Entered here and exited in end()/abort(): the file spans many write() calls
+        self.writer = atomic_write(self.path)
+        self.file = self.writer.__enter__()
+        self.first = True
+        return self.path
+
+    def write(self, rows):
+        if not rows:
+            return
+        keys = self.keys
+        text = json.dumps([dict(zip(keys, row)) for row in rows], indent=4, ensure_ascii=False)
+        # Drop the batch's own "[\n" ... "\n]" so batches join into one array
+        self.file.write(("[\n" if self.first else ",\n") + text[2:-2])
+        self.first = False
+
+    def end(self):
+        self.file.write("[]" if self.first else "\n]")
+        writer, self.writer = self.writer, None
+        writer.__exit__(None, None, None)
+        return self.path
+
+    def abort(self):
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            # Removes the temp file and keeps any previous output untouched
+            error = RuntimeError("aborted")
+            writer.__exit__(type(error), error, None)
+
+
+class SqliteSink(Sink):
+    """
+    One table per output in a SQLite database. Each batch is inserted with a
+    single executemany() inside its own transaction.
+    """
+
+    # Bulk-load settings; the journal stays in memory so a failed batch can
+    # still be rolled back, but nothing is fsynced until the OS flushes.
+    DEFAULT_PRAGMAS = {
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "temp_store": "MEMORY",
+        "cache_size": -65536,  # KiB
+        "locking_mode": "EXCLUSIVE",
+    }
+    DEFAULT_BATCH_SIZE = 50_000
+
+    def __init__(self, output_dir, database="mock_data.db", batch_size=None, pragmas=None, if_exists="replace"):
+        import sqlite3
+
+        if if_exists not in ("replace", "append"):
+            raise ValueError(f"if_exists must be 'replace' or 'append', got '{if_exists}'")
+        self.path = database if os.path.isabs(database) else os.path.join(output_dir, database)
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.if_exists = if_exists
+        pragmas = {**self.DEFAULT_PRAGMAS, **(pragmas or {})}
+        for name, value in pragmas.items():
+            if not re.fullmatch(r'[A-Za-z_]+', str(name)) or not re.fullmatch(r'-?\w+', str(value)):
+                raise ValueError(f"invalid PRAGMA {name}={value}")
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        for name, value in pragmas.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
+
+    @staticmethod
+    def quote(name):
+        return '"' + str(name).replace('"', '""') + '"'
+
+    def begin(self, item, columns):
+        table = item.get("table") or os.path.splitext(item.get("filename", "output"))[0]
+        quoted = self.quote(table)
+        column_defs = ", ".join(f"{self.quote(name)} {sql_type}".rstrip() for name, sql_type in columns)
+        self.conn.execute("BEGIN")
+        if self.if_exists == "replace":
+            self.conn.execute(f"DROP TABLE IF EXISTS {quoted}")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {quoted} ({column_defs})")
+        self.conn.execute("COMMIT")
+        self.insert = f"INSERT INTO {quoted} VALUES ({', '.join('?' * len(columns))})"
+        return f"{self.path}:{table}"
+
+    def write(self, rows):
+        conn = self.conn
+        conn.execute("BEGIN")
+        conn.executemany(self.insert, rows)
+        conn.execute("COMMIT")
+
+    def end(self):
+        return self.path
+
+    def abort(self):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+    def close(self):
+        self.conn.close()
+
+
+# sink type -> class; constructed as cls(output_dir, **options)
+SINKS = {
+    "json": JsonSink,
+    "sqlite": SqliteSink,
+}
+
+
+def _sink_spec(spec):
+    return {"type": spec} if isinstance(spec, str) else dict(spec or {})
+
+
+def create_sink(spec, output_dir, overrides=None):
+    """
+    Build a sink from a config value: "json", "sqlite" or
+    {"type": "sqlite", "database": "mock.db", "batch_size": 50000, "pragmas": {...}}.
+    overrides (same forms) are applied on top; switching to another type drops
+    the options of the configured one.
+    """
+    spec, overrides = _sink_spec(spec), _sink_spec(overrides)
+    if overrides.get("type", spec.get("type", "json")) != spec.get("type", "json"):
+        spec = {}
+    spec.update(overrides)
+    kind = spec.pop("type", "json")
+    if kind not in SINKS:
+        raise ValueError(f"unknown sink '{kind}' (available: {', '.join(SINKS)})")
+    try:
+        return SINKS[kind](output_dir, **spec)
+    except TypeError as e:
+        raise ValueError(f"invalid options for sink '{kind}': {e}") from None
+
+
+def generate_data(config_path, output_dir, seed=None, sink=None):
+    """
+    Reads the config file and generates mock data in the output directory.
+    Returns the list of written paths.
+    """
+    written = []
     if not os.path.exists(config_path):
-        print(f"Error: Config file not found at {config_path}")
-        return
+        inst.error(f"Error: Config file not found at {config_path}", config=config_path)
+        return written
+
+    try:
+        with inst.span("load_config"):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+    except json.JSONDecodeError as e:
+        inst.error(f"Error parsing JSON config: {e}", config=config_path)
+        return written
 
+    return generate_from_config(config, output_dir, seed, sink)
+
+def generate_from_config(config, output_dir, seed=None, sink=None):
+    """
+    Generates mock data for an already-parsed config dict.
+    Returns the list of written paths (JSON files or the SQLite database).
+    seed (or a top-level "seed" in the config) makes the output reproducible.
+    The config's top-level "sink" selects the destination (see create_sink());
+    sink overrides it, e.g. {"type": "sqlite"} or {"batch_size": 100000}.
+    """
+    written = []
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    seed = config.get("seed") if seed is None else seed
+    rng = random.Random(seed) if seed is not None else random
+
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON config: {e}")
-        return
-
-    for item in config.get("outputs", []):
-        filename = item.get("filename", "output.json")
-        count = item.get("count", 10)
-        schema = item.get("schema", {})
-        
-        data_list = []
-        for i in range(1, count + 1):
-            record = {}
-            for key, field_type in schema.items():
-                record[key] = generate_value(field_type, i)
-            data_list.append(record)
-        
-        output_path = os.path.join(output_dir, filename)
-        try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(data_list, f, indent=4, ensure_ascii=False)
-            print(f"Generated {count} records in {output_path}")
-        except IOError as e:
-            print(f"Error writing file {output_path}: {e}")
+        sink = create_sink(config.get("sink"), output_dir, sink)
+    except Exception as e:  # ValueError, or the sink's own errors (e.g. sqlite3.Error)
+        inst.error(f"Error opening sink: {e}")
+        return written
 
-if __name__ == "__main__":
+    try:
+        for item in config.get("outputs", []):
+            path = _generate_output(item, sink, rng)
+            if path is not None and path not in written:
+                written.append(path)
+    finally:
+        sink.close()
+
+    return written
+
+def _generate_output(item, sink, rng):
+    filename = item.get("filename", "output.json")
+    count = item.get("count", 10)
+    schema = item.get("schema", {})
+
+    try:
+        columns = compile_schema(schema, rng)
+    except ValueError as e:
+        inst.error(f"Error in schema for {filename}: {e}", filename=filename)
+        return None
+    samplers = dict(columns)
+    keys = list(schema)
+
+    target = None
+    try:
+        with inst.span("generate", filename=filename, sink=type(sink).__name__) as s:
+            target = sink.begin(item, [(key, samplers[key].sql_type) for key in keys])
+            for rows in generate_rows(columns, keys, count, sink.batch_size):
+                sink.write(rows)
+                s.count("records", len(rows))
+            path = sink.end()
+            if os.path.isfile(target):
+                s.count("files")
+                s.count("bytes", os.path.getsize(target))
+    except Exception as e:  # IOError, or database errors from the sink
+        sink.abort()
+        inst.error(f"Error writing {target or filename}: {e}", filename=filename)
+        return None
+
+    if s.duration:
+        inst.debug(f"{filename}: {count / s.duration:,.0f} records/s",
+                   filename=filename, seconds=round(s.duration, 3))
+    inst.info(f"Generated {count} records in {target}", records=count, path=target)
+    return path
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Generate mock data based on a JSON configuration.")
     parser.add_argument("--config", required=True, help="Path to the JSON configuration file.")
     parser.add_argument("--output", default=".", help="Directory to save generated files.")
-    
-    args = parser.parse_args()
-    generate_data(args.config, args.output)
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible output (overrides the config's \"seed\").")
+    parser.add_argument("--sink", choices=sorted(SINKS), help="Destination (overrides the config's \"sink\"; default json).")
+    parser.add_argument("--database", help="SQLite database file for --sink sqlite (default mock_data.db in --output).")
+    parser.add_argument("--batch-size", type=int, help="Rows per batch / transaction.")
+    inst.add_arguments(parser)
+
+    args = parser.parse_args(argv)
+    inst.setup(args)
+    sink = {}
+    if args.sink or args.database:
+        sink["type"] = args.sink or "sqlite"
+    if args.database:
+        sink["database"] = args.database
+    if args.batch_size:
+        sink["batch_size"] = args.batch_size
+    with inst.span("generate_data"):
+        generate_data(args.config, args.output, args.seed, sink)
+    inst.finish(args)
+
+if __name__ == "__main__":
+    main()
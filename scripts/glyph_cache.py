@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Text-layer cache for generate_logo.
+
+Batches of icons usually repeat the same font and a short text (plugin
+initials). Instead of rasterizing the glyphs for every icon, the
+super-sampled coverage mask of a text run is cached and reused:
+
+- Colour is applied at composite time (tinting), so one layer serves every
+  text colour.
+- Layers are keyed by (font file identity, font size, text), so output is
+  pixel-identical to an uncached render. With derive_sizes=True a request
+  for a smaller size of a cached (font, text) is instead resampled from the
+  larger layer; derived edges differ from a direct rasterization, and the
+  result then depends on what was rendered earlier in the process, so it
+  is opt-in.
+- Entries are evicted LRU by count and by total bytes.
+- An optional on-disk store (one PNG per layer) shares layers between runs
+  and processes.
+
+Pillow is imported lazily, like in generate_logo.
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+# Smallest size ratio (requested / cached) a cached layer may be resampled to
+MIN_DERIVE_RATIO = 0.5
+
+# PNG text chunk holding layer metadata in the on-disk store
+# (plain names such as "bbox" collide with Pillow's own image attributes)
+PNG_TEXT_KEY = "forguncy-glyph-layer"
+
+
+def font_identity(font_path):
+    """Stable identity for a font file: path plus size and mtime, so edits invalidate the cache."""
+    if not font_path:
+        return "<default>"
+    try:
+        st = os.stat(font_path)
+        return f"{os.path.abspath(font_path)}|{st.st_size}|{int(st.st_mtime)}"
+    except OSError:
+        return os.path.abspath(font_path)
+
+
+class TextLayer:
+    """Coverage mask ('L', tight to the ink box) and the bbox it was cut from."""
+
+    __slots__ = ("mask", "bbox")
+
+    def __init__(self, mask, bbox):
+        self.mask = mask
+        self.bbox = bbox
+
+    @property
+    def nbytes(self):
+        return self.mask.size[0] * self.mask.size[1]
+
+
+def render_text_layer(font, text):
+    """Rasterize text once at the font's size into a tight coverage mask."""
+    from PIL import Image, ImageDraw
+
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    return TextLayer(mask, (left, top, right, bottom))
+
+
+class GlyphCache:
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, disk_dir=None, derive_sizes=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.derive_sizes = derive_sizes
+        self._entries = OrderedDict()
+        self._sizes = {}  # (font_id, text) -> font sizes of exact (non-derived) cached layers
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "derived": 0, "disk_hits": 0, "evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, font, font_path, font_size, text):
+        """Return the TextLayer for text in font (loaded from font_path at font_size)."""
+        font_id = font_identity(font_path)
+        key = (font_id, font_size, text)
+
+        layer = self._entries.get(key)
+        if layer is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return layer
+
+        exact = True
+        layer = self._load_from_disk(key)
+        if layer is not None:
+            self.stats["disk_hits"] += 1
+        else:
+            layer = self._derive(font, font_id, font_size, text)
+            if layer is not None:
+                self.stats["derived"] += 1
+                exact = False
+            else:
+                layer = render_text_layer(font, text)
+                self.stats["misses"] += 1
+                self._save_to_disk(key, layer)
+
+        self._put(key, layer, exact)
+        return layer
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    # -- internals ---------------------------------------------------------
+
+    def _put(self, key, layer, exact):
+        self._entries[key] = layer
+        self._bytes += layer.nbytes
+        # Only directly rasterized layers may seed derivations (no compounding resampling)
+        if exact:
+            self._sizes.setdefault((key[0], key[2]), set()).add(key[1])
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, old_layer = self._entries.popitem(last=False)
+            self._bytes -= old_layer.nbytes
+            sizes = self._sizes.get((old_key[0], old_key[2]))
+            if sizes is not None:
+                sizes.discard(old_key[1])
+                if not sizes:
+                    del self._sizes[(old_key[0], old_key[2])]
+            self.stats["evictions"] += 1
+
+    def _derive(self, font, font_id, font_size, text):
+        """Resample the closest larger cached layer of the same font and text."""
+        if not self.derive_sizes or font_id == "<default>":
+            return None
+        sizes = self._sizes.get((font_id, text))
+        if not sizes:
+            return None
+        candidates = [s for s in sizes if s > font_size and font_size / s >= MIN_DERIVE_RATIO]
+        if not candidates:
+            return None
+        source = self._entries[(font_id, min(candidates), text)]
+
+        from PIL import Image
+
+        # Position comes from the real metrics at the requested size; only pixels are resampled.
+        left, top, right, bottom = font.getbbox(text)
+        size = (max(1, right - left), max(1, bottom - top))
+        mask = source.mask.resize(size, resample=Image.Resampling.LANCZOS)
+        return TextLayer(mask, (left, top, right, bottom))
+
+    def _disk_path(self, key):
+        # Imported here: hashlib loads OpenSSL, which the in-memory cache never needs
+        import hashlib
+
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.png")
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        from PIL import Image
+        try:
+            with Image.open(path) as im:
+                im.load()
+                bbox = tuple(json.loads(im.text[PNG_TEXT_KEY])["bbox"])
+                return TextLayer(im.convert('L'), bbox)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save_to_disk(self, key, layer):
+        if not self.disk_dir:
+            return
+        from PIL.PngImagePlugin import PngInfo
+
+        info = PngInfo()
+        info.add_text(PNG_TEXT_KEY, json.dumps({"bbox": list(layer.bbox), "key": list(key)}, ensure_ascii=False))
+        from skill_files import atomic_write
+
+        try:
+            with atomic_write(self._disk_path(key), "wb") as f:
+                layer.mask.save(f, "PNG", pnginfo=info)
+        except OSError:
+            pass  # the disk store is best-effort
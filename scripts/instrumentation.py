@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Shared instrumentation for the build scripts.
+
+Provides timed spans, byte/file counters and structured logging so that
+package_skill, optimize_knowledge and generate_mock_data can report where
+time goes in CI. Nothing is written unless --profile is passed.
+
+Usage (inside a script):
+    import instrumentation as inst
+
+    parser = argparse.ArgumentParser()
+    inst.add_arguments(parser)
+    args = parser.parse_args()
+    inst.setup(args)
+
+    with inst.span("copy") as s:
+        ...
+        s.count("bytes", size)
+
+    inst.finish(args)
+
+Command line:
+    --profile trace.json      Write a Chrome trace (open in chrome://tracing or Perfetto)
+    --cprofile out.prof       Additionally dump cProfile stats
+    -v / -q                   Raise / lower verbosity (per-file lines are DEBUG)
+    --log-format json         Emit one JSON object per log line
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("forguncy_skill")
+
+
+class Span:
+    """A timed region. Counters added to a span are also added to the global totals."""
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = dict(args)
+        self.start = 0.0
+        self.end = 0.0
+
+    def count(self, key, value=1):
+        self.args[key] = self.args.get(key, 0) + value
+        self.tracer.count(key, value)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class Tracer:
+    """Collects spans and counters for one process run."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **args):
+        s = Span(self, name, args)
+        s.start = time.perf_counter()
+        try:
+            yield s
+        finally:
+            s.end = time.perf_counter()
+            with self._lock:
+                self.spans.append((s, threading.get_ident()))
+            log_event(logging.DEBUG, f"⏱️  {name}: {s.duration * 1000:.1f} ms",
+                      span=name, duration_ms=round(s.duration * 1000, 3), **s.args)
+
+    def count(self, key, value=1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        """Drop collected spans and counters (long-lived processes call this per request)."""
+        with self._lock:
+            self.origin = time.perf_counter()
+            self.spans = []
+            self.counters = {}
+
+    def to_chrome_trace(self):
+        """Return the collected data in Chrome Trace Event Format."""
+        pid = os.getpid()
+        events = [{
+            "name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+            "args": {"name": os.path.basename(sys.argv[0]) or "python"},
+        }]
+        last_ts = 0.0
+        for s, tid in self.spans:
+            ts = (s.start - self.origin) * 1e6
+            dur = s.duration * 1e6
+            last_ts = max(last_ts, ts + dur)
+            events.append({
+                "name": s.name, "cat": "stage", "ph": "X", "pid": pid, "tid": tid,
+                "ts": round(ts, 3), "dur": round(dur, 3), "args": s.args,
+            })
+        for key, value in sorted(self.counters.items()):
+            events.append({
+                "name": key, "ph": "C", "pid": pid, "tid": 0,
+                "ts": round(last_ts, 3), "args": {key: value},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+
+TRACER = Tracer()
+
+
+def span(name, **args):
+    """Time a block on the process-wide tracer."""
+    return TRACER.span(name, **args)
+
+
+def count(key, value=1):
+    """Add to a process-wide counter (e.g. "files", "bytes")."""
+    TRACER.count(key, value)
+
+
+# ---------------------------------------------------------------------------
+# Structured logging
+# ---------------------------------------------------------------------------
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        msg = record.getMessage()
+        if record.levelno >= logging.WARNING and not msg.startswith(("⚠️", "❌")):
+            msg = f"{record.levelname}: {msg}"
+        return msg
+
+
+def log_event(level, msg, **fields):
+    """Log a message with machine-readable fields attached."""
+    if not logger.handlers:
+        configure_logging()
+    logger.log(level, msg, extra={"fields": fields})
+
+
+def debug(msg, **fields):
+    log_event(logging.DEBUG, msg, **fields)
+
+
+def info(msg, **fields):
+    log_event(logging.INFO, msg, **fields)
+
+
+def warning(msg, **fields):
+    log_event(logging.WARNING, msg, **fields)
+
+
+def error(msg, **fields):
+    log_event(logging.ERROR, msg, **fields)
+
+
+def configure_logging(verbosity=0, log_format="text", stream=None):
+    """
+    Configure the shared logger.
+    verbosity: 0 = INFO (default), >0 = DEBUG (per-file lines), <0 = WARNING.
+    stream: defaults to stdout; servers that own stdout pass stderr.
+    """
+    if verbosity > 0:
+        level = logging.DEBUG
+    elif verbosity < 0:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(_JsonFormatter() if log_format == "json" else _TextFormatter())
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+# ---------------------------------------------------------------------------
+# Command line integration
+# ---------------------------------------------------------------------------
+
+def add_arguments(parser):
+    """Add the shared --profile / verbosity options to an argparse parser."""
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--profile", metavar="TRACE_JSON", help="Write a Chrome trace of the run to this file")
+    group.add_argument("--cprofile", metavar="PROF_FILE", help="Also dump cProfile stats to this file")
+    group.add_argument("-v", "--verbose", action="count", default=0, help="Show per-file output (DEBUG)")
+    group.add_argument("-q", "--quiet", action="count", default=0, help="Only show warnings and errors")
+    group.add_argument("--log-format", choices=["text", "json"], default="text", help="Log line format")
+    return parser
+
+
+_profiler = None
+
+
+def setup(args):
+    """Configure logging and start cProfile if requested."""
+    global _profiler
+    configure_logging(getattr(args, "verbose", 0) - getattr(args, "quiet", 0),
+                      getattr(args, "log_format", "text"))
+    if getattr(args, "cprofile", None):
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def finish(args):
+    """Stop profiling and write the requested profile outputs."""
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        directory = os.path.dirname(os.path.abspath(args.cprofile))
+        os.makedirs(directory, exist_ok=True)
+        _profiler.dump_stats(args.cprofile)
+        info(f"📈 cProfile stats written to: {args.cprofile}", cprofile=args.cprofile)
+        _profiler = None
+    if getattr(args, "profile", None):
+        TRACER.write_chrome_trace(args.profile)
+        info(f"📈 Chrome trace written to: {args.profile}",
+             trace=args.profile, spans=len(TRACER.spans), **TRACER.counters)
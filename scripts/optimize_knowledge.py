@@ -1,25 +1,79 @@
 
+import argparse
+import hashlib
 import os
 import re
+from collections import defaultdict
+
+import instrumentation as inst
+from skill_files import atomic_write
+
+# Near-duplicate detection (MinHash over character shingles + LSH banding)
+SHINGLE_SIZE = 5            # characters; the corpus is mostly Chinese, so no word splitting
+MINHASH_BINS = 128          # one-permutation MinHash signature length
+LSH_BANDS = 16              # 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always collide
+DUPLICATE_THRESHOLD = 0.8   # exact Jaccard required to report a pair
+REWRITE_THRESHOLD = 0.95    # copies are only replaced by a cross-reference when (almost) identical
+MIN_SECTION_CHARS = 300     # shorter sections are ignored (headings, one-liners)
+_MAX_HASH = (1 << 64) - 1
 
 def clean_empty_files(base_dir):
-    print("Cleaning empty or near-empty files...")
+    inst.info("Cleaning empty or near-empty files...")
     count = 0
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.lower().endswith('.md'):
-                path = os.path.join(root, file)
-                try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                    # Check if empty or just headers/html
-                    if len(content) < 100 or content == "" or re.match(r'^#+\s+.*(\n+##\s+Content)?(\n+<p>.*</p>)?$', content, re.DOTALL):
-                        print(f"  Deleting empty file: {file}")
-                        os.remove(path)
-                        count += 1
-                except Exception as e:
-                    print(f"  Error checking {file}: {e}")
-    print(f"Deleted {count} empty files.\n")
+    with inst.span("clean_empty_files") as s:
+        for root, dirs, files in os.walk(base_dir):
+            for file in files:
+                if file.lower().endswith('.md'):
+                    path = os.path.join(root, file)
+                    s.count("scanned_files")
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            content = f.read().strip()
+                        s.count("scanned_bytes", len(content))
+                        # Check if empty or just a title line (+ "## Content" / one <p> line)
+                        if len(content) < 100 or content == "" or re.match(r'^#+[ \t]+[^\n]*(\n+##\s+Content)?(\n+<p>.*</p>)?$', content):
+                            inst.debug(f"  Deleting empty file: {file}", file=path)
+                            os.remove(path)
+                            count += 1
+                    except Exception as e:
+                        inst.warning(f"  Error checking {file}: {e}", file=path)
+        s.count("deleted_files", count)
+    inst.info(f"Deleted {count} empty files.\n", deleted=count)
+
+SECTION_SEPARATOR = '\n\n---\n\n'
+
+def iter_sections(file_path):
+    """
+    Yield the '---'-delimited sections of a Markdown file one at a time
+    (same boundaries as re.split(r'\\n---\\n', content)), so memory is bounded
+    by the largest section instead of the whole file.
+    """
+    buffer = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line == '---\n' and buffer and buffer[-1].endswith('\n'):
+                section = ''.join(buffer)
+                yield section[:-1]
+                buffer = []
+            else:
+                buffer.append(line)
+    yield ''.join(buffer)
+
+class SectionWriter:
+    """Streams sections into one output file, separated like '\\n\\n---\\n\\n'.join(...)."""
+
+    def __init__(self, f, title):
+        self.f = f
+        self.count = 0
+        self.bytes = 0
+        f.write(f"# {title}\n\n")
+
+    def write(self, section):
+        if self.count:
+            self.f.write(SECTION_SEPARATOR)
+        self.f.write(section)
+        self.count += 1
+        self.bytes += len(section)
 
 def optimize_content(content):
     # 1. Remove Source line
@@ -77,28 +131,35 @@ def consolidate_optimized(base_dir, file_list, output_filename, title):
     if not file_list:
         return
 
-    print(f"Consolidating {len(file_list)} files into {output_filename}...")
+    inst.info(f"Consolidating {len(file_list)} files into {output_filename}...")
     
-    with open(os.path.join(base_dir, output_filename), 'w', encoding='utf-8') as outfile:
+    with inst.span("consolidate", output=output_filename) as s, \
+            atomic_write(os.path.join(base_dir, output_filename), fsync=True) as outfile:
         outfile.write(f"# {title}\n\n")
         
         for f_name in file_list:
             file_path = os.path.join(base_dir, f_name)
             try:
+                # Source pages are small single-property files: optimize each one whole,
+                # since the Source-line and <p> rules apply to the file, not to its sections
                 with open(file_path, 'r', encoding='utf-8') as infile:
                     content = infile.read()
-                
+                s.count("input_files")
+                s.count("input_bytes", len(content))
+
                 optimized = optimize_content(content)
                 if optimized:
                     outfile.write(f"## {f_name.replace('.md', '').replace('_', ' ')}\n\n")
                     outfile.write(optimized)
                     outfile.write(f"\n\n---\n\n")
+                    s.count("output_bytes", len(optimized))
+                inst.debug(f"  Consolidated: {f_name}", file=f_name)
                 
             except Exception as e:
-                print(f"Error reading {f_name}: {e}")
+                inst.warning(f"Error reading {f_name}: {e}", file=f_name)
 
 def process_directory(base_dir):
-    print(f"Processing {base_dir}...")
+    inst.info(f"Processing {base_dir}...")
     
     # Gather all property files
     all_files = [f for f in os.listdir(base_dir) if f.endswith('.md')]
@@ -108,7 +169,7 @@ def process_directory(base_dir):
     # If we are in ServerCommand/Reference_Manual, files are named Addproperty_*.md or Attribute_*.md
     
     if not property_files:
-        print("  No property files found.")
+        inst.info("  No property files found.")
         return
 
     basic_files, complex_files = classify_properties(property_files)
@@ -119,7 +180,7 @@ def process_directory(base_dir):
     # Remove old Properties.md if exists
     if os.path.exists(os.path.join(base_dir, 'Properties.md')):
         os.remove(os.path.join(base_dir, 'Properties.md'))
-        print("  Removed old Properties.md")
+        inst.info("  Removed old Properties.md")
         
     # Remove individual files after consolidation? 
     # The user asked to "consolidate", so we should probably remove the source files to reduce clutter.
@@ -138,29 +199,35 @@ def split_existing_properties_file(file_path):
     if not os.path.exists(file_path):
         return
 
-    print(f"Splitting existing {file_path}...")
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-    # Split by separator
-    # The previous script used: "\n\n---\n\n<!-- Origin: ... -->\n\n"
-    sections = re.split(r'\n---\n', content)
-    
-    basic_content = []
-    complex_content = []
-    
+    inst.info(f"Splitting existing {file_path}...")
+
+    with inst.span("split_properties", file=file_path) as s:
+        _split_properties(file_path, s)
+
+def _split_properties(file_path, s):
     basic_patterns = [
         r'Boolean', r'Color', r'Decimal', r'Double', r'Enum', 
         r'Font', r'Formula', r'Integer', r'Percentage', r'String'
     ]
     
-    header = sections[0] # The main header of the file
+    dir_path = os.path.dirname(file_path)
     
-    for section in sections[1:]:
-        # Extract Origin
-        match = re.search(r'<!-- Origin: (.*?) -->', section)
-        if match:
+    # Sections are routed to their output as they are read; both outputs only
+    # replace the existing files once the whole input has been processed.
+    with atomic_write(os.path.join(dir_path, 'Properties_Basic.md'), fsync=True) as basic_file, \
+            atomic_write(os.path.join(dir_path, 'Properties_Complex.md'), fsync=True) as complex_file:
+        basic = SectionWriter(basic_file, "Basic Properties Reference")
+        complex_ = SectionWriter(complex_file, "Complex Properties Reference")
+        
+        # The first section is the main header of the file
+        for index, section in enumerate(iter_sections(file_path)):
+            s.count("input_bytes", len(section))
+            if index == 0:
+                continue
+            # Extract Origin
+            match = re.search(r'<!-- Origin: (.*?) -->', section)
+            if not match:
+                continue
             origin_name = match.group(1)
             
             is_basic = False
@@ -170,32 +237,253 @@ def split_existing_properties_file(file_path):
                     break
             
             # Optimize the section content
-            optimized_section = optimize_content(section)
-            
-            if is_basic:
-                basic_content.append(optimized_section)
-            else:
-                complex_content.append(optimized_section)
-    
-    dir_path = os.path.dirname(file_path)
-    
-    with open(os.path.join(dir_path, 'Properties_Basic.md'), 'w', encoding='utf-8') as f:
-        f.write("# Basic Properties Reference\n\n")
-        f.write('\n\n---\n\n'.join(basic_content))
-        
-    with open(os.path.join(dir_path, 'Properties_Complex.md'), 'w', encoding='utf-8') as f:
-        f.write("# Complex Properties Reference\n\n")
-        f.write('\n\n---\n\n'.join(complex_content))
+            (basic if is_basic else complex_).write(optimize_content(section))
+    s.count("input_files")
+    s.count("sections", basic.count + complex_.count)
+    s.count("output_bytes", basic.bytes + complex_.bytes)
         
-    print(f"  Created Properties_Basic.md and Properties_Complex.md")
+    inst.info(f"  Created Properties_Basic.md and Properties_Complex.md")
     
     # Remove original
     os.remove(file_path)
-    print(f"  Removed {file_path}")
+    inst.info(f"  Removed {file_path}")
 
-def main():
-    base_ref = r'e:\code\forguncy-plugin-master-skill\src\skills\forguncy-plugin-expert\references'
-    
+# ---------------------------------------------------------------------------
+# Near-duplicate sections
+# ---------------------------------------------------------------------------
+
+class Section:
+    def __init__(self, path, heading_line, body_start, end, title, body):
+        self.path = path                  # relative to the references directory
+        self.heading_line = heading_line  # 0-based line index of the heading
+        self.body_start = body_start      # first line after the heading
+        self.end = end                    # one past the last line
+        self.title = title                # "parent heading > heading"
+        self.body = body
+        self.shingles = None
+        self.signature = None
+
+    def __repr__(self):
+        return f"{self.path}:{self.heading_line + 1}"
+
+
+def split_markdown_sections(path, rel, max_level=3):
+    """Sections of a Markdown file, split at headings up to max_level outside code fences."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    starts = []
+    stack = []
+    fence = None
+    for i, line in enumerate(lines):
+        m = re.match(r'^\s*(```|~~~)', line)
+        if m:
+            fence = None if fence == m.group(1) else (fence or m.group(1))
+            continue
+        if fence:
+            continue
+        h = re.match(r'^(#{1,6})\s+(.*?)\s*#*\s*$', line)
+        if h and len(h.group(1)) <= max_level:
+            level = len(h.group(1))
+            stack = [x for x in stack if x[0] < level] + [(level, h.group(2))]
+            starts.append((i, " > ".join(t for _, t in stack[-2:])))
+
+    sections = []
+    for n, (start, title) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        body = "\n".join(lines[start + 1:end]).strip()
+        sections.append(Section(rel, start, start + 1, end, title, body))
+    return lines, sections
+
+
+def shingle_hashes(text, k=SHINGLE_SIZE):
+    # Normalize whitespace and case so reflowed copies still match
+    text = re.sub(r'\s+', ' ', text.lower())
+    return {
+        int.from_bytes(hashlib.blake2b(text[i:i + k].encode('utf-8'), digest_size=8).digest(), 'little')
+        for i in range(max(1, len(text) - k + 1))
+    }
+
+
+def minhash_signature(hashes, bins=MINHASH_BINS):
+    """
+    One-permutation MinHash: each shingle hash is hashed once; its low bits pick
+    a bin and the rest competes for that bin's minimum. Empty bins borrow from
+    the next non-empty bin (rotation densification), so the signature stays
+    comparable position by position.
+    """
+    shift = bins.bit_length() - 1
+    mins = [_MAX_HASH] * bins
+    for h in hashes:
+        b = h & (bins - 1)
+        v = h >> shift
+        if v < mins[b]:
+            mins[b] = v
+    if _MAX_HASH in mins and len(set(mins)) > 1:
+        for b in range(bins):
+            if mins[b] == _MAX_HASH:
+                step = 1
+                while mins[(b + step) % bins] == _MAX_HASH:
+                    step += 1
+                mins[b] = mins[(b + step) % bins] + step
+    return mins
+
+
+def find_near_duplicates(base_dir, threshold=DUPLICATE_THRESHOLD, bands=LSH_BANDS):
+    """
+    Return (sections, clusters): clusters are lists of (section, jaccard to the
+    canonical section), canonical first. Time is linear in the corpus size plus
+    the number of LSH candidate pairs.
+    """
+    rows = MINHASH_BINS // bands
+    sections = []
+    with inst.span("dedupe_signatures") as s:
+        for root, dirs, files in os.walk(base_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith('.md'):
+                    continue
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, base_dir).replace(os.sep, '/')
+                for section in split_markdown_sections(path, rel)[1]:
+                    if len(section.body) < MIN_SECTION_CHARS:
+                        continue
+                    section.shingles = shingle_hashes(section.body)
+                    section.signature = minhash_signature(section.shingles)
+                    sections.append(section)
+                    s.count("sections")
+                    s.count("shingles", len(section.shingles))
+
+    with inst.span("dedupe_lsh") as s:
+        buckets = defaultdict(list)
+        for idx, section in enumerate(sections):
+            for band in range(bands):
+                key = (band, tuple(section.signature[band * rows:(band + 1) * rows]))
+                buckets[key].append(idx)
+        candidates = set()
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    candidates.add((members[a], members[b]))
+        s.count("candidate_pairs", len(candidates))
+
+    # Verify candidates with the exact Jaccard similarity and union them
+    parent = list(range(len(sections)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    with inst.span("dedupe_verify") as s:
+        for a, b in candidates:
+            sa, sb = sections[a].shingles, sections[b].shingles
+            if len(sa & sb) / len(sa | sb) >= threshold:
+                parent[find(a)] = find(b)
+                s.count("duplicate_pairs")
+
+    groups = defaultdict(list)
+    for idx in range(len(sections)):
+        groups[find(idx)].append(sections[idx])
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        # Canonical: the most complete copy, then the shortest path (usually the dedicated manual)
+        members.sort(key=lambda x: (-len(x.body), x.path.count('/'), x.path, x.heading_line))
+        canonical = members[0]
+        cluster = [(canonical, 1.0)]
+        for other in members[1:]:
+            cluster.append((other, len(canonical.shingles & other.shingles) / len(canonical.shingles | other.shingles)))
+        clusters.append(cluster)
+    clusters.sort(key=lambda c: -sum(len(x.body) for x, _ in c[1:]))
+    return sections, clusters
+
+
+def report_near_duplicates(clusters):
+    saved = sum(len(x.body) for c in clusters for x, _ in c[1:])
+    inst.info(f"Found {len(clusters)} clusters of near-duplicate sections "
+              f"({sum(len(c) - 1 for c in clusters)} redundant copies, ~{saved:,} characters).",
+              clusters=len(clusters), redundant_chars=saved)
+    for n, cluster in enumerate(clusters, 1):
+        canonical = cluster[0][0]
+        inst.info(f"\n[{n}] {canonical.title} ({len(canonical.body):,} chars)")
+        for section, similarity in cluster:
+            marker = "keep" if section is canonical else f"{similarity:.2f}"
+            inst.info(f"    {marker:>5}  {section.path}:{section.heading_line + 1}  {section.title}")
+
+
+def rewrite_near_duplicates(base_dir, clusters, min_similarity=REWRITE_THRESHOLD):
+    """
+    Replace non-canonical copies (similarity to the canonical section >= min_similarity)
+    with a cross-reference to the canonical section. Looser matches are only reported:
+    they often differ in the code that matters (e.g. insert vs. update examples).
+    """
+    by_file = defaultdict(list)
+    for cluster in clusters:
+        canonical = cluster[0][0]
+        for section, similarity in cluster[1:]:
+            if similarity >= min_similarity:
+                by_file[section.path].append((section, canonical))
+    if not by_file:
+        inst.info(f"No copies at or above {min_similarity:.2f} similarity; nothing rewritten.")
+        return
+
+    with inst.span("dedupe_rewrite") as s:
+        for rel, replacements in sorted(by_file.items()):
+            path = os.path.join(base_dir, rel)
+            lines = split_markdown_sections(path, rel)[0]
+            # Bottom-up so earlier line numbers stay valid
+            for section, canonical in sorted(replacements, key=lambda r: -r[0].heading_line):
+                link = os.path.relpath(os.path.join(base_dir, canonical.path),
+                                       os.path.dirname(path)).replace(os.sep, '/')
+                note = f"> 本节内容与 [{canonical.path}]({link}) 中的「{canonical.title}」重复，已合并，请参阅该处。"
+                lines[section.body_start:section.end] = ["", note, ""]
+                s.count("rewritten_sections")
+            with atomic_write(path, fsync=True) as f:
+                f.write("\n".join(lines) + "\n")
+            s.count("rewritten_files")
+            inst.info(f"  Cross-referenced {len(replacements)} section(s) in {rel}", file=rel)
+
+
+def dedupe_references(base_ref, rewrite=False, threshold=DUPLICATE_THRESHOLD, rewrite_threshold=REWRITE_THRESHOLD):
+    inst.info(f"Detecting near-duplicate sections in {base_ref}...")
+    with inst.span("dedupe"):
+        _, clusters = find_near_duplicates(base_ref, threshold)
+        report_near_duplicates(clusters)
+        if rewrite and clusters:
+            inst.info("")
+            rewrite_near_duplicates(base_ref, clusters, rewrite_threshold)
+    return clusters
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize the skill knowledge base (references)")
+    parser.add_argument("base_ref",
+                        help="Path to the references directory to rewrite in place (files are deleted "
+                             "and consolidated; run it on a scratch copy)")
+    parser.add_argument("--dedupe", choices=['report', 'rewrite'],
+                        help="Only run near-duplicate section detection: report clusters, or rewrite the "
+                             "corpus keeping one canonical section and cross-referencing the copies")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help=f"Jaccard similarity for near-duplicates (default {DUPLICATE_THRESHOLD})")
+    parser.add_argument("--rewrite-threshold", type=float, default=REWRITE_THRESHOLD,
+                        help=f"Minimum similarity for a copy to be replaced by a cross-reference "
+                             f"(default {REWRITE_THRESHOLD})")
+    inst.add_arguments(parser)
+    args = parser.parse_args(argv)
+    inst.setup(args)
+
+    with inst.span("optimize_knowledge"):
+        if args.dedupe:
+            dedupe_references(args.base_ref, args.dedupe == 'rewrite', args.threshold, args.rewrite_threshold)
+        else:
+            optimize_references(args.base_ref)
+
+    inst.finish(args)
+
+def optimize_references(base_ref):
     # 1. Clean empty files first
     clean_empty_files(base_ref)
     
@@ -7,15 +7,18 @@ Usage:
 """
 
 import sys
-import zipfile
 import os
+import posixpath
 import shutil
 import json
+import re
 import argparse
 from pathlib import Path
 
-# Add scripts directory to path to import quick_validate
-sys.path.append(str(Path(__file__).parent))
+import instrumentation as inst
+import symbol_index
+import reference_bundle
+import skill_patch
 try:
     from quick_validate import validate_skill
 except ImportError:
@@ -41,10 +44,10 @@ def get_version(skill_path):
                 data = json.load(f)
                 version = data.get("version")
                 if version:
-                    print(f"📌 Using version from project root: {version}")
+                    inst.info(f"📌 Using version from project root: {version}", version=version)
                     return version
         except Exception as e:
-            print(f"⚠️ Warning: Could not read root package.json: {e}")
+            inst.warning(f"⚠️ Warning: Could not read root package.json: {e}")
 
     # Fallback to skill directory package.json
     package_json_file = Path(skill_path) / "package.json"
@@ -54,7 +57,7 @@ def get_version(skill_path):
                 data = json.load(f)
                 return data.get("version", "1.0.0")
         except Exception as e:
-            print(f"⚠️ Warning: Could not read package.json: {e}")
+            inst.warning(f"⚠️ Warning: Could not read package.json: {e}")
             
     return "1.0.0"
 
@@ -75,7 +78,7 @@ def create_package_json(output_path, skill_name, version):
     
     with open(output_path / "package.json", "w", encoding="utf-8") as f:
         json.dump(package_json, f, indent=2)
-    print(f"📄 Created package.json in {output_path} with version {version}")
+    inst.info(f"📄 Created package.json in {output_path} with version {version}")
 
 
 def create_readme(output_path, skill_name):
@@ -143,13 +146,110 @@ npx skills remove {skill_name}
 """
     with open(output_path / "README.md", "w", encoding="utf-8") as f:
         f.write(content)
-    print(f"📄 Created README.md in {output_path}")
+    inst.info(f"📄 Created README.md in {output_path}")
 
 
-def package_skill(skill_input, output_dir=None, format='folder'):
+def discover_files(skill_path, excluded_files, excluded_dirs):
+    """
+    Walk the skill folder and return the list of (source, relative path) pairs to copy.
+    """
+    discovered = []
+    for root, dirs, files in os.walk(skill_path):
+        # Modify dirs in-place to exclude unwanted directories
+        dirs[:] = [d for d in dirs if d not in excluded_dirs]
+
+        rel_path = Path(root).relative_to(skill_path)
+        for file in files:
+            if file.startswith('.') or file.endswith('.pyc') or file.endswith('.skill'):
+                continue
+            if file in excluded_files:
+                continue
+            discovered.append((Path(root) / file, rel_path / file))
+    return discovered
+
+
+_MD_LINK = re.compile(r'\]\(([^)#\s]+\.md)(?:#[^)]*)?\)')
+
+BUNDLE_ONLY_NOTE = """
+> **参考文档压缩包**：本安装包只保留了上面列出的文档及其链接到的文档，其余参考文档存放在 `references.bundle` 中。
+> 若某个 `references/` 下的文件不存在（例如 `scripts/symbol_index.py` 查找结果指向的文件），请改用：
+> `python scripts/reference_bundle.py cat <references 下的相对路径>`（`--heading <标题>` 只读取一个章节，`list` 列出全部文件）。
+"""
+
+
+def linked_references(skill_md, references_dir):
+    """
+    Reference files reachable from SKILL.md by following Markdown links
+    (relative to references/): SKILL.md's own links, then every link in the
+    kept files, transitively.
+    """
+    if not skill_md.exists():
+        return set()
+    text = skill_md.read_text(encoding="utf-8")
+    pending = [m.replace("\\_", "_") for m in re.findall(r'\]\(references/([^)#\s]+\.md)', text)]
+    keep = set()
+    while pending:
+        rel = posixpath.normpath(pending.pop())
+        path = references_dir / rel
+        if rel in keep or rel.startswith("../") or not path.is_file():
+            continue
+        keep.add(rel)
+        for link in _MD_LINK.findall(path.read_text(encoding="utf-8")):
+            link = link.replace("\\_", "_")
+            pending.append(link[len("references/"):] if link.startswith("references/")
+                           else posixpath.join(posixpath.dirname(rel), link))
+    return keep
+
+
+def bundle_references(target_skill_dir, bundle_only=False):
+    """
+    Write references.bundle next to references/. With bundle_only, loose Markdown
+    files are removed except the ones reachable through links from SKILL.md, and
+    SKILL.md gets a note on reading the others from the bundle.
+    """
+    references_dir = target_skill_dir / "references"
+    bundle_path = target_skill_dir / reference_bundle.BUNDLE_NAME
+    with inst.span("reference_bundle") as s:
+        stats = reference_bundle.build_bundle(references_dir, bundle_path)
+        s.count("sections", stats["sections"])
+        s.count("bundle_bytes", stats["bundle_bytes"])
+        if bundle_only:
+            skill_md = target_skill_dir / "SKILL.md"
+            keep = linked_references(skill_md, references_dir)
+            for path in sorted(references_dir.rglob("*.md")):
+                rel = path.relative_to(references_dir).as_posix()
+                if rel not in keep:
+                    path.unlink()
+                    s.count("removed_files")
+            for dirpath, _, _ in sorted(os.walk(references_dir), reverse=True):
+                if dirpath != str(references_dir) and not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+            if skill_md.exists():
+                add_bundle_note(skill_md)
+    inst.info(f"🗜️  Bundled references: {stats['raw_bytes']:,} -> {stats['bundle_bytes']:,} bytes "
+              f"({stats['sections']} sections)", **stats)
+    return bundle_path
+
+
+def add_bundle_note(skill_md):
+    """Insert BUNDLE_ONLY_NOTE after the core document list (or at the end) of SKILL.md."""
+    text = skill_md.read_text(encoding="utf-8")
+    m = re.search(r'^## 核心文档.*?(?=^## )', text, re.M | re.S)
+    at = m.end() if m else len(text)
+    text = text[:at].rstrip("\n") + "\n" + BUNDLE_ONLY_NOTE + ("\n" if m else "") + text[at:]
+    skill_md.write_text(text, encoding="utf-8")
+
+
+def package_skill(skill_input, output_dir=None, format='folder', references_bundle='none', delta_from=None):
     """
     Package a skill folder into a build directory or .skill file.
+    references_bundle: 'none', 'add' (references.bundle next to the Markdown files)
+    or 'only' (bundle plus the files reachable through links from SKILL.md).
+    delta_from: previous release manifest (or its folder); also writes a .skillpatch
+    next to the output directory.
     """
+    repo_root = Path(__file__).parent.parent
+
     # Determine skill path
     # 1. Check if input is a valid path
     input_path = Path(skill_input).resolve()
@@ -157,27 +257,27 @@ def package_skill(skill_input, output_dir=None, format='folder'):
         skill_path = input_path
     else:
         # 2. Check if input is a skill name in src/skills
-        repo_root = Path(__file__).parent.parent
         candidate_path = repo_root / "src" / "skills" / skill_input
         if candidate_path.exists() and candidate_path.is_dir():
             skill_path = candidate_path
         else:
-             print(f"❌ Error: Skill not found at {input_path} or {candidate_path}")
+             inst.error(f"❌ Error: Skill not found at {input_path} or {candidate_path}")
              return None
 
-    print(f"📦 Packaging skill from: {skill_path}")
+    inst.info(f"📦 Packaging skill from: {skill_path}", skill_path=str(skill_path))
 
     # Get version
     version = get_version(skill_path)
-    print(f"📌 Version: {version}")
+    inst.info(f"📌 Version: {version}", version=version)
 
     # Run validation
-    print("🔍 Validating skill...")
-    valid, message = validate_skill(skill_path)
+    inst.info("🔍 Validating skill...")
+    with inst.span("validation"):
+        valid, message = validate_skill(skill_path)
     if not valid:
-        print(f"❌ Validation failed: {message}")
+        inst.error(f"❌ Validation failed: {message}")
         return None
-    print(f"✅ {message}\n")
+    inst.info(f"✅ {message}\n")
 
     # Determine output location
     skill_name = skill_path.name
@@ -186,6 +286,20 @@ def package_skill(skill_input, output_dir=None, format='folder'):
     else:
         output_path = Path.cwd() / "build"
     
+    # Load the previous manifest before the output directory is cleaned: it may
+    # live inside it (-o rel1 --delta-from rel1 rebuilds a release in place).
+    old_manifest = None
+    if delta_from:
+        try:
+            old_manifest = skill_patch.load_manifest(delta_from)
+            if not isinstance(old_manifest.get("files"), dict):
+                raise ValueError("missing 'files'")
+        except (OSError, ValueError, AttributeError) as e:
+            inst.error(f"❌ Invalid --delta-from manifest {delta_from}: {e}")
+            return None
+        inst.info(f"🧾 Previous release: {old_manifest.get('version')} "
+                  f"({len(old_manifest['files'])} files)", delta_from=str(delta_from))
+
     # Clean and recreate output directory if building folder
     # Always build folder first, then zip if needed
     if output_path.exists():
@@ -197,32 +311,39 @@ def package_skill(skill_input, output_dir=None, format='folder'):
     EXCLUDED_DIRS = {'.git', '.trae', '__pycache__', 'build', 'dist', 'node_modules', 'scripts'}
 
     try:
-        print(f"📂 Building skill to directory: {output_path}")
+        inst.info(f"📂 Building skill to directory: {output_path}", output_path=str(output_path))
         
         # Create standard skills structure: output/skills/skill_name/
         target_skill_dir = output_path / "skills" / skill_name
         target_skill_dir.mkdir(parents=True, exist_ok=True)
 
+        with inst.span("discovery") as s:
+            discovered = discover_files(skill_path, EXCLUDED_FILES, EXCLUDED_DIRS)
+            s.count("files", len(discovered))
+
         # Copy files
-        for root, dirs, files in os.walk(skill_path):
-            # Modify dirs in-place to exclude unwanted directories
-            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-            
-            rel_path = Path(root).relative_to(skill_path)
-            target_dir = target_skill_dir / rel_path
-            target_dir.mkdir(parents=True, exist_ok=True)
-            
-            for file in files:
-                if file.startswith('.') or file.endswith('.pyc') or file.endswith('.skill'):
-                    continue
-                if file in EXCLUDED_FILES:
-                    continue
-                    
-                src_file = Path(root) / file
-                dst_file = target_dir / file
+        with inst.span("copy") as s:
+            for src_file, rel_file in discovered:
+                dst_file = target_skill_dir / rel_file
+                dst_file.parent.mkdir(parents=True, exist_ok=True)
                 shutil.copy2(src_file, dst_file)
-                print(f"  Copied: {rel_path / file}")
+                s.count("copied_files")
+                s.count("copied_bytes", dst_file.stat().st_size)
+                inst.debug(f"  Copied: {rel_file}", file=rel_file.as_posix())
         
+        # Precompute the API symbol index so lookups do not have to read the references
+        references_dir = target_skill_dir / "references"
+        if references_dir.is_dir():
+            with inst.span("symbol_index") as s:
+                index = symbol_index.build_index(references_dir)
+                index_path = symbol_index.write_index(index, target_skill_dir / "assets" / symbol_index.INDEX_NAME)
+                s.count("symbols", len(index["symbols"]))
+                s.count("index_bytes", index_path.stat().st_size)
+            inst.info(f"🔖 Indexed {len(index['symbols'])} API symbols: {index_path.relative_to(output_path)}")
+
+            if references_bundle != 'none':
+                bundle_references(target_skill_dir, bundle_only=(references_bundle == 'only'))
+
         # Create package.json and README.md in root output dir
         create_package_json(output_path, skill_name, version)
         create_readme(output_path, skill_name)
@@ -232,19 +353,22 @@ def package_skill(skill_input, output_dir=None, format='folder'):
         internal_rule_src = skill_path / "assets" / "internal" / "forguncy-plugin-skill-apply.md"
         
         if internal_rule_src.exists():
-            print(f"⚙️  Processing IDE rules from: {internal_rule_src}")
-            
-            # 1. Trae Support: .trae/rules/skill-apply.md
-            trae_rules_dir = output_path / ".trae" / "rules"
-            trae_rules_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(internal_rule_src, trae_rules_dir / "skill-apply.md")
-            print(f"  Generated: .trae/rules/skill-apply.md")
-
-            # 2. Cursor Support: .cursor/rules/skill-apply.mdc
-            cursor_rules_dir = output_path / ".cursor" / "rules"
-            cursor_rules_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(internal_rule_src, cursor_rules_dir / "skill-apply.mdc")
-            print(f"  Generated: .cursor/rules/skill-apply.mdc")
+            inst.info(f"⚙️  Processing IDE rules from: {internal_rule_src}")
+
+            with inst.span("rule_generation") as s:
+                # 1. Trae Support: .trae/rules/skill-apply.md
+                trae_rules_dir = output_path / ".trae" / "rules"
+                trae_rules_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(internal_rule_src, trae_rules_dir / "skill-apply.md")
+                s.count("rule_files")
+                inst.debug(f"  Generated: .trae/rules/skill-apply.md")
+
+                # 2. Cursor Support: .cursor/rules/skill-apply.mdc
+                cursor_rules_dir = output_path / ".cursor" / "rules"
+                cursor_rules_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(internal_rule_src, cursor_rules_dir / "skill-apply.mdc")
+                s.count("rule_files")
+                inst.debug(f"  Generated: .cursor/rules/skill-apply.mdc")
             
         # Copy scripts to output directory (inside the skill folder)
         scripts_src = repo_root / "scripts"
@@ -252,52 +376,89 @@ def package_skill(skill_input, output_dir=None, format='folder'):
         scripts_dst = target_skill_dir / "scripts"
         
         if scripts_src.exists():
-            print(f"⚙️  Copying scripts to skill directory: {scripts_dst}")
+            inst.info(f"⚙️  Copying scripts to skill directory: {scripts_dst}")
             scripts_dst.mkdir(parents=True, exist_ok=True)
-            for file in os.listdir(scripts_src):
-                if file.endswith('.ps1') or file.endswith('.py'):
-                    # Skip package_skill related scripts to avoid confusion in distribution
-                    # Also skip setup_project.ps1 and optimize_knowledge.py as requested
-                    if 'package_skill' in file or 'setup_project' in file or 'optimize_knowledge' in file:
-                        continue
-                    shutil.copy2(scripts_src / file, scripts_dst / file)
-                    print(f"  Copied script: {file}")
-
-        print(f"\n✅ Successfully built skill folder to: {output_path}")
+            with inst.span("copy_scripts") as s:
+                for file in os.listdir(scripts_src):
+                    if file.endswith('.ps1') or file.endswith('.py'):
+                        # Skip package_skill related scripts to avoid confusion in distribution
+                        # Also skip setup_project.ps1 and optimize_knowledge.py as requested
+                        if 'package_skill' in file or 'setup_project' in file or 'optimize_knowledge' in file:
+                            continue
+                        # Benchmarks (bench_*.py) are builder-only as well
+                        if file.startswith('bench_'):
+                            continue
+                        shutil.copy2(scripts_src / file, scripts_dst / file)
+                        s.count("copied_files")
+                        s.count("copied_bytes", (scripts_dst / file).stat().st_size)
+                        inst.debug(f"  Copied script: {file}", file=file)
+
+        # Release manifest (hashes + block signatures) for delta upgrades
+        with inst.span("manifest") as s:
+            manifest = skill_patch.build_manifest(target_skill_dir, version)
+            skill_patch.write_manifest(manifest, target_skill_dir)
+            s.count("files", len(manifest["files"]))
+        inst.info(f"🧾 Wrote {skill_patch.MANIFEST_NAME} ({len(manifest['files'])} files)")
+
+        if old_manifest is not None:
+            patch_path = output_path.parent / f"{skill_name}-{old_manifest.get('version')}-to-{version}.skillpatch"
+            with inst.span("delta") as s:
+                stats = skill_patch.create_patch(old_manifest, target_skill_dir, manifest, patch_path)
+                s.count("patch_bytes", stats["patch_bytes"])
+            inst.info(f"🩹 Created delta patch: {patch_path} ({stats['patch_bytes']:,} bytes; "
+                      f"{stats['added']} added, {stats['replaced']} replaced, {stats['delta']} delta, "
+                      f"{stats['deleted']} deleted, {stats['unchanged']} unchanged)", **stats)
+
+        inst.info(f"\n✅ Successfully built skill folder to: {output_path}")
 
         if format == 'zip':
-            print(f"\n📦 Compressing to .skill file...")
-            # Create zip from output_path
-            # shutil.make_archive creates a zip file with base_name.zip
-            archive_name = shutil.make_archive(str(output_path), 'zip', output_path)
-            
-            # Rename .zip to .skill
-            skill_file_path = output_path.with_suffix('.skill')
-            if skill_file_path.exists():
-                os.remove(skill_file_path)
-            
-            os.rename(archive_name, skill_file_path)
-            print(f"✅ Created skill package: {skill_file_path}")
+            inst.info(f"\n📦 Compressing to .skill file...")
+            with inst.span("archive") as s:
+                # Create zip from output_path
+                # shutil.make_archive creates a zip file with base_name.zip
+                archive_name = shutil.make_archive(str(output_path), 'zip', output_path)
+
+                # Rename .zip to .skill
+                skill_file_path = output_path.with_suffix('.skill')
+                if skill_file_path.exists():
+                    os.remove(skill_file_path)
+
+                os.rename(archive_name, skill_file_path)
+                s.count("archive_bytes", skill_file_path.stat().st_size)
+            inst.info(f"✅ Created skill package: {skill_file_path}")
             
             return skill_file_path
 
         return output_path
 
     except Exception as e:
-        print(f"❌ Error processing skill: {e}")
+        inst.error(f"❌ Error processing skill: {e}")
         return None
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Skill Packager")
     parser.add_argument("skill_input", nargs="?", help="Path to skill folder OR skill name (in src/skills)", default="forguncy-plugin-expert")
     parser.add_argument("--output", "-o", help="Output directory")
     parser.add_argument("--format", "-f", choices=['zip', 'folder'], default='folder', help="Output format (zip or folder)")
+    parser.add_argument("--references-bundle", choices=['none', 'add', 'only'], default='none',
+                        help="Also store references/ as one compressed, randomly accessible references.bundle "
+                             "('only' keeps as Markdown just the files reachable through links from SKILL.md)")
+    parser.add_argument("--delta-from", metavar="MANIFEST",
+                        help="Previous release skill_manifest.json (or its folder): also write a .skillpatch "
+                             "with only the changes")
+    inst.add_arguments(parser)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    inst.setup(args)
+
+    with inst.span("package_skill"):
+        result = package_skill(args.skill_input, args.output, args.format, args.references_bundle,
+                               args.delta_from)
 
-    package_skill(args.skill_input, args.output, args.format)
+    inst.finish(args)
+    return 0 if result else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Reference Bundle - the references/ tree as one file with random-access sections.
+
+Every Markdown file is split at its headings (outside code fences) into
+sections. Each section is zlib-compressed on its own against a shared preset
+dictionary trained on the corpus (boilerplate lines repeated across
+sections), so a single section can be decompressed without touching the
+rest of the bundle. Only the standard library is needed to read it.
+
+Layout:
+    MAGIC (8 bytes)
+    dictionary
+    compressed sections...
+    footer index (zlib-compressed JSON)
+    trailer: index offset (u64), index length (u64), MAGIC
+
+Footer index:
+    {
+      "version": 1,
+      "dict": [offset, length],
+      "files": [{"path": "SOP.md", "size": 1234, "sections": [first, count]}, ...],
+      "sections": [[file, src_offset, raw_length, offset, length, crc32, [headings]], ...]
+    }
+src_offset is the byte offset of the section in its source file, so offsets
+from the symbol index (assets/symbol_index.json) map straight to a section.
+
+Usage:
+    python scripts/reference_bundle.py build [references_dir] -o references.bundle
+    python scripts/reference_bundle.py list [--bundle PATH] [FILE]
+    python scripts/reference_bundle.py cat FILE [--bundle PATH] [--section N | --heading TEXT | --offset BYTES]
+"""
+
+import bisect
+import json
+import os
+import re
+import struct
+import sys
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import instrumentation as inst
+from skill_files import atomic_write, skill_path
+
+BUNDLE_VERSION = 1
+BUNDLE_NAME = "references.bundle"
+MAGIC = b"FGREFBN1"
+TRAILER = struct.Struct("<QQ8s")
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# zlib windows are 32 KiB; on this corpus 16 KiB gives the smallest bundle (dictionary included)
+MAX_DICT_BYTES = 16 * 1024
+# Sections are split at headings up to this level ...
+SPLIT_LEVEL = 3
+# ... and small neighbours are merged so each compressed block has something to work with
+MIN_SECTION_BYTES = 2048
+COMPRESS_LEVEL = 9
+
+_FENCE = re.compile(rb'^\s*(```|~~~)')
+_HEADING = re.compile(rb'^(#{1,6})\s+(.*?)\s*#*\s*$')
+
+
+class BundleError(ValueError):
+    pass
+
+
+def default_bundle_path():
+    return SCRIPTS_DIR.parent / BUNDLE_NAME
+
+
+# ---------------------------------------------------------------------------
+# Building
+# ---------------------------------------------------------------------------
+
+def split_sections(data):
+    """
+    Split Markdown bytes at headings (level <= SPLIT_LEVEL, outside code fences).
+    Returns [(src_offset, [headings], bytes)]; concatenating the bytes gives data back.
+    """
+    starts = [(0, None)]
+    offset = 0
+    fence = None
+    for line in data.splitlines(keepends=True):
+        m = _FENCE.match(line)
+        if m:
+            if fence is None:
+                fence = m.group(1)
+            elif m.group(1) == fence:
+                fence = None
+        elif fence is None:
+            h = _HEADING.match(line.rstrip(b"\r\n"))
+            if h and len(h.group(1)) <= SPLIT_LEVEL and offset > 0:
+                starts.append((offset, h.group(2).decode("utf-8", "replace")))
+            elif h and offset == 0:
+                starts[0] = (0, h.group(2).decode("utf-8", "replace"))
+        offset += len(line)
+
+    sections = []
+    for i, (start, heading) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(data)
+        chunk = data[start:end]
+        headings = [heading] if heading is not None else []
+        if sections and len(sections[-1][2]) < MIN_SECTION_BYTES:
+            prev_offset, prev_headings, prev_chunk = sections[-1]
+            sections[-1] = (prev_offset, prev_headings + headings, prev_chunk + chunk)
+        else:
+            sections.append((start, headings, chunk))
+    return sections
+
+
+def train_dictionary(chunks, max_bytes=MAX_DICT_BYTES):
+    """
+    Build a zlib preset dictionary from lines that recur across sections.
+    Lines are scored by (sections containing them - 1) * length; the best ones
+    go last, where zlib finds them at the shortest distances.
+    """
+    document_frequency = Counter()
+    for chunk in chunks:
+        document_frequency.update({line.strip() for line in chunk.splitlines() if len(line.strip()) >= 8})
+    scored = [((df - 1) * len(line), line) for line, df in document_frequency.items() if df >= 2]
+    scored.sort(reverse=True)
+
+    picked, size = [], 0
+    for _, line in scored:
+        if size + len(line) + 1 > max_bytes:
+            continue
+        picked.append(line)
+        size += len(line) + 1
+    picked.reverse()
+    return b"\n".join(picked) + b"\n" if picked else b""
+
+
+def _compress(data, zdict):
+    c = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15, zdict=zdict) if zdict else \
+        zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    return c.compress(data) + c.flush()
+
+
+def build_bundle(references_dir, output_path):
+    """Write the bundle for references_dir. Returns a stats dict."""
+    references_dir = Path(references_dir)
+    paths = sorted(p for p in references_dir.rglob("*.md") if p.is_file())
+
+    with inst.span("split") as s:
+        files = []
+        for path in paths:
+            data = path.read_bytes()
+            files.append((path.relative_to(references_dir).as_posix(), data, split_sections(data)))
+            s.count("files")
+            s.count("raw_bytes", len(data))
+        chunks = [chunk for _, _, sections in files for _, _, chunk in sections]
+
+    with inst.span("train_dictionary") as s:
+        zdict = train_dictionary(chunks)
+        s.count("dict_bytes", len(zdict))
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    index = {"version": BUNDLE_VERSION, "files": [], "sections": []}
+    with inst.span("compress") as s, atomic_write(output_path, "wb") as out:
+        out.write(MAGIC)
+        index["dict"] = [out.tell(), len(zdict)]
+        out.write(zdict)
+        for file_id, (rel, data, sections) in enumerate(files):
+            index["files"].append({"path": rel, "size": len(data), "sections": [len(index["sections"]), len(sections)]})
+            for src_offset, headings, chunk in sections:
+                blob = _compress(chunk, zdict)
+                index["sections"].append([file_id, src_offset, len(chunk), out.tell(), len(blob),
+                                          zlib.crc32(chunk), headings])
+                out.write(blob)
+                s.count("sections")
+                s.count("compressed_bytes", len(blob))
+        footer = zlib.compress(json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9)
+        index_offset = out.tell()
+        out.write(footer)
+        out.write(TRAILER.pack(index_offset, len(footer), MAGIC))
+
+    raw = sum(len(data) for _, data, _ in files)
+    return {
+        "files": len(files),
+        "sections": len(index["sections"]),
+        "raw_bytes": raw,
+        "bundle_bytes": output_path.stat().st_size,
+        "dict_bytes": len(zdict),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class Section:
+    __slots__ = ("id", "file", "src_offset", "raw_length", "offset", "length", "crc", "headings")
+
+    def __init__(self, section_id, file, src_offset, raw_length, offset, length, crc, headings):
+        self.id = section_id
+        self.file = file
+        self.src_offset = src_offset
+        self.raw_length = raw_length
+        self.offset = offset
+        self.length = length
+        self.crc = crc
+        self.headings = headings
+
+    @property
+    def heading(self):
+        return self.headings[0] if self.headings else ""
+
+
+class ReferenceBundle:
+    """
+    Random-access reader. Opening reads only the trailer and footer index;
+    each section read is one seek + one read of its compressed bytes.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or default_bundle_path())
+        self._fh = open(self.path, "rb")
+        self._zdict = None
+        try:
+            self._load_index()
+        except Exception:
+            self._fh.close()
+            raise
+
+    def _load_index(self):
+        fh = self._fh
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise BundleError(f"{self.path} is not a reference bundle")
+        fh.seek(-TRAILER.size, os.SEEK_END)
+        index_offset, index_length, magic = TRAILER.unpack(fh.read(TRAILER.size))
+        if magic != MAGIC:
+            raise BundleError(f"{self.path} is truncated (missing trailer)")
+        fh.seek(index_offset)
+        index = json.loads(zlib.decompress(fh.read(index_length)).decode("utf-8"))
+        if index.get("version") != BUNDLE_VERSION:
+            raise BundleError(f"unsupported bundle version {index.get('version')!r}")
+        self._dict_span = index["dict"]
+        self.files = {}
+        self.sections = [Section(i, *entry) for i, entry in enumerate(index["sections"])]
+        for entry in index["files"]:
+            first, count = entry["sections"]
+            self.files[entry["path"]] = (entry["size"], first, count)
+        self._file_names = [entry["path"] for entry in index["files"]]
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def list_files(self):
+        return list(self.files)
+
+    def file_sections(self, path):
+        """Sections of one file, in order."""
+        try:
+            _, first, count = self.files[path]
+        except KeyError:
+            raise BundleError(f"no such file in bundle: {path}") from None
+        return self.sections[first:first + count]
+
+    def read_section(self, section):
+        """Decompress one section (Section or section id) and return its text."""
+        if isinstance(section, int):
+            section = self.sections[section]
+        if self._zdict is None:
+            offset, length = self._dict_span
+            self._fh.seek(offset)
+            self._zdict = self._fh.read(length)
+        self._fh.seek(section.offset)
+        blob = self._fh.read(section.length)
+        d = zlib.decompressobj(-15, zdict=self._zdict) if self._zdict else zlib.decompressobj(-15)
+        data = d.decompress(blob) + d.flush()
+        if zlib.crc32(data) != section.crc:
+            raise BundleError(f"checksum mismatch in section {section.id} of {self._file_names[section.file]}")
+        return data.decode("utf-8")
+
+    def read_file(self, path):
+        return "".join(self.read_section(s) for s in self.file_sections(path))
+
+    def section_at(self, path, src_offset):
+        """Section of path containing byte offset src_offset (e.g. a symbol index section_offset)."""
+        sections = self.file_sections(path)
+        i = bisect.bisect_right([s.src_offset for s in sections], src_offset) - 1
+        return sections[max(i, 0)]
+
+    def find_heading(self, text, path=None):
+        """Sections with a heading containing text (case-insensitive)."""
+        needle = text.lower()
+        pool = self.file_sections(path) if path else self.sections
+        return [s for s in pool if any(needle in h.lower() for h in s.headings)]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or read the compressed references bundle")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = sub.add_parser("build", help="Bundle a references directory")
+    build_parser.add_argument("references", nargs="?", help="References directory (default: the skill's references/)")
+    build_parser.add_argument("--output", "-o", default=BUNDLE_NAME, help="Bundle file to write")
+    inst.add_arguments(build_parser)
+
+    list_parser = sub.add_parser("list", help="List files, or the sections of one file")
+    list_parser.add_argument("file", nargs="?")
+    list_parser.add_argument("--bundle", help="Bundle file (default: ../references.bundle)")
+
+    cat_parser = sub.add_parser("cat", help="Print a file or one of its sections")
+    cat_parser.add_argument("file")
+    cat_parser.add_argument("--bundle", help="Bundle file (default: ../references.bundle)")
+    group = cat_parser.add_mutually_exclusive_group()
+    group.add_argument("--section", type=int, help="Section number within the file (see 'list FILE')")
+    group.add_argument("--heading", help="First section whose heading contains this text")
+    group.add_argument("--offset", type=int, help="Section containing this byte offset of the source file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        inst.setup(args)
+        references = args.references or skill_path("references")
+        with inst.span("build_bundle"):
+            stats = build_bundle(references, args.output)
+        ratio = stats["bundle_bytes"] / stats["raw_bytes"] if stats["raw_bytes"] else 0
+        inst.info(f"✅ Bundled {stats['files']} files ({stats['sections']} sections): "
+                  f"{stats['raw_bytes']:,} -> {stats['bundle_bytes']:,} bytes ({ratio:.0%}) {args.output}", **stats)
+        inst.finish(args)
+        return 0
+
+    try:
+        with ReferenceBundle(args.bundle) as bundle:
+            if args.command == "list":
+                if args.file:
+                    for i, s in enumerate(bundle.file_sections(args.file)):
+                        print(f"{i:4d}  @{s.src_offset:<8d} {s.raw_length:>7,d} B  {' | '.join(s.headings)}")
+                else:
+                    for path, (size, _, count) in bundle.files.items():
+                        print(f"{size:>9,d} B  {count:3d} sections  {path}")
+                return 0
+
+            if args.section is not None:
+                sections = bundle.file_sections(args.file)
+                if not 0 <= args.section < len(sections):
+                    raise BundleError(f"{args.file} has {len(sections)} sections")
+                text = bundle.read_section(sections[args.section])
+            elif args.heading:
+                matches = bundle.find_heading(args.heading, args.file)
+                if not matches:
+                    raise BundleError(f"no heading matching '{args.heading}' in {args.file}")
+                text = bundle.read_section(matches[0])
+            elif args.offset is not None:
+                text = bundle.read_section(bundle.section_at(args.file, args.offset))
+            else:
+                text = bundle.read_file(args.file)
+    except (OSError, BundleError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
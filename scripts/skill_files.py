@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Shared file helpers for the skill scripts.
+
+- skill_path(): locate a file or folder of the skill whether the scripts run
+  from an installed skill (skills/<name>/scripts) or from the builder
+  repository checkout (scripts/ next to src/skills/<name>).
+- atomic_write(): write through a temp file in the target directory that
+  replaces the target only when the block completes, so a failed run never
+  leaves a half-written file behind.
+"""
+
+import contextlib
+import os
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+SKILL_NAME = "forguncy-plugin-expert"
+
+
+def skill_path(*parts):
+    """
+    Path of parts inside the skill: the installed layout if it exists there,
+    else the builder checkout, else the installed-layout path.
+    """
+    candidates = [
+        # Installed skill: skills/<name>/scripts -> skills/<name>/<parts>
+        SCRIPTS_DIR.parent.joinpath(*parts),
+        # Builder repository checkout
+        SCRIPTS_DIR.parent.joinpath("src", "skills", SKILL_NAME, *parts),
+    ]
+    for path in candidates:
+        if path.exists():
+            return path
+    return candidates[0]
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", fsync=False):
+    """
+    Open path for writing ("w" text as UTF-8, or "wb") through a temp file next
+    to it and move it into place when the block completes. On any error the
+    temp file is removed and path is left untouched.
+    """
+    path = os.fspath(path)
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    f = open(tmp_path, mode, encoding=None if "b" in mode else "utf-8")
+    try:
+        yield f
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+        f.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Skill Helper - long-lived helper server for agents.
+
+Agents following SKILL.md call the helper scripts many times per session.
+Each call normally pays interpreter startup, the Pillow import and font
+discovery. This server keeps those subsystems loaded and answers JSON-RPC
+2.0 requests (one JSON object per line) over stdin/stdout, a Unix socket
+or a localhost TCP port.
+
+Methods:
+    ping                                   -> {"pong": true, "pid": ...}
+    logo      {"config": {...} | [...]}    -> {"outputs": [paths]}
+    mock      {"config": {...} | "config_path": str, "output": dir, "seed": int, "sink": "sqlite" | {...}}
+                                           -> {"outputs": [paths]}
+    validate  {"path": skill_dir}          -> {"valid": bool, "message": str}
+    scaffold  {"spec": {...}, "output": dir, "force": bool, "dry_run": bool}
+                                           -> {"outputs": [relative paths]}
+    lookup    {"name": str | "names": [str], "limit": int}
+                                           -> {"results": {name: {"symbol", "count", "refs"} | null}}
+    search    {"query": str, "limit": 20, "references": dir or references.bundle}
+                                           -> {"matches": [{"file", "line", "text"}]}
+    shutdown                               -> stops a socket server
+
+Usage:
+    python skill_helper.py serve                     # stdin/stdout
+    python skill_helper.py serve --socket            # default socket / port
+    python skill_helper.py call logo '{"config": {"text": "AB", "output_path": "a.png"}}'
+
+The client (`call`) talks to a running server and falls back to executing
+the request in-process when none is reachable, so it is always safe to use.
+
+Socket servers live in a per-user runtime directory (0700; $XDG_RUNTIME_DIR
+or %LOCALAPPDATA% when available) and write a random session token to a
+user-only file next to the socket. Every socket request must carry it as the
+non-standard "token" member; a connection is closed on its first line that
+is not an authorized JSON-RPC request.
+"""
+
+import json
+import os
+import socket
+import sys
+
+DEFAULT_PORT = 47821
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNTIME_DIR_NAME = "forguncy-skill-helper"
+SOCKET_NAME = "helper.sock"
+
+# Error codes closing a socket connection (anything but an authorized JSON-RPC request)
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+UNAUTHORIZED = -32003
+_FATAL_CODES = (PARSE_ERROR, INVALID_REQUEST, UNAUTHORIZED)
+
+
+def runtime_dir():
+    """
+    Per-user directory for the socket and token files, created 0700.
+    Refuses a directory owned by someone else or readable by other users.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, RUNTIME_DIR_NAME)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    import stat
+    import tempfile
+
+    xdg = os.environ.get("XDG_RUNTIME_DIR")
+    if xdg and os.path.isdir(xdg):
+        path = os.path.join(xdg, RUNTIME_DIR_NAME)
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"{RUNTIME_DIR_NAME}-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"Unsafe helper runtime directory {path}: "
+                           f"it must be a directory owned by this user with mode 0700")
+    return path
+
+
+def default_address():
+    """Socket path (POSIX) or ("127.0.0.1", port) where AF_UNIX is unavailable."""
+    env = os.environ.get("FORGUNCY_SKILL_HELPER")
+    if env:
+        if env.isdigit():
+            return ("127.0.0.1", int(env))
+        return env
+    if hasattr(socket, "AF_UNIX") and os.name != "nt":
+        return os.path.join(runtime_dir(), SOCKET_NAME)
+    return ("127.0.0.1", DEFAULT_PORT)
+
+
+def token_path(address):
+    """User-only file holding the session token of the server at address."""
+    if isinstance(address, tuple):
+        name = f"tcp-{address[1]}.token"
+    else:
+        address = os.path.abspath(address)
+        if os.path.dirname(address) == runtime_dir():
+            name = f"{os.path.basename(address)}.token"
+        else:
+            import hashlib
+            name = f"unix-{hashlib.sha1(address.encode('utf-8')).hexdigest()[:16]}.token"
+    return os.path.join(runtime_dir(), name)
+
+
+def write_token(path):
+    """Create a fresh random session token in a 0600 file and return it."""
+    import secrets
+
+    token = secrets.token_hex(32)
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def read_token(address):
+    """Session token of the server at address, or None if it has none."""
+    try:
+        with open(token_path(address), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Request handlers (imported lazily, then kept warm for the life of the process)
+# ---------------------------------------------------------------------------
+
+class ReferenceIndex:
+    """All reference Markdown files held in memory for repeated searches."""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = []
+        if os.path.isfile(root):
+            # Compressed references.bundle (see reference_bundle.py)
+            from reference_bundle import ReferenceBundle
+            with ReferenceBundle(root) as bundle:
+                for rel in bundle.list_files():
+                    lines = bundle.read_file(rel).splitlines()
+                    self.files.append((rel, lines, [line.lower() for line in lines]))
+            return
+        for dirpath, dirs, files in os.walk(root):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".md"):
+                    path = os.path.join(dirpath, name)
+                    with open(path, "r", encoding="utf-8") as f:
+                        lines = f.read().splitlines()
+                    rel = os.path.relpath(path, root).replace(os.sep, "/")
+                    self.files.append((rel, lines, [line.lower() for line in lines]))
+
+    def search(self, query, limit=20):
+        needle = query.lower()
+        matches = []
+        for rel, lines, lowered in self.files:
+            for number, line in enumerate(lowered, 1):
+                if needle in line:
+                    matches.append({"file": rel, "line": number, "text": lines[number - 1].strip()})
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+
+def _default_references():
+    from skill_files import skill_path
+
+    # Installed skill packaged with --references-bundle (holds every file)
+    bundle = skill_path("references.bundle")
+    return str(bundle if bundle.exists() else skill_path("references"))
+
+
+class Handlers:
+    def __init__(self):
+        self._indexes = {}
+        self._symbols = {}
+
+    def ping(self, params):
+        return {"pong": True, "pid": os.getpid()}
+
+    def logo(self, params):
+        import generate_logo
+        configs = params.get("config", {})
+        if isinstance(configs, dict):
+            configs = [configs]
+        return {"outputs": [generate_logo.generate_logo(cfg) for cfg in configs]}
+
+    def mock(self, params):
+        import generate_mock_data
+        output = params.get("output", ".")
+        if "config" in params:
+            written = generate_mock_data.generate_from_config(params["config"], output, params.get("seed"), params.get("sink"))
+        else:
+            written = generate_mock_data.generate_data(params["config_path"], output, params.get("seed"), params.get("sink"))
+        return {"outputs": written}
+
+    def validate(self, params):
+        from quick_validate import validate_skill
+        valid, message = validate_skill(params["path"])
+        return {"valid": valid, "message": message}
+
+    def scaffold(self, params):
+        import template_engine
+        written = template_engine.scaffold(
+            params["spec"], params.get("output", "."), params.get("templates"),
+            overwrite=bool(params.get("force")), dry_run=bool(params.get("dry_run")))
+        return {"outputs": written}
+
+    def search(self, params):
+        root = os.path.abspath(params.get("references") or _default_references())
+        index = self._indexes.get(root)
+        if index is None:
+            index = self._indexes[root] = ReferenceIndex(root)
+        return {"matches": index.search(params["query"], int(params.get("limit", 20)))}
+
+    def lookup(self, params):
+        import symbol_index
+        key = (params.get("index"), params.get("references"))
+        index = self._symbols.get(key)
+        if index is None:
+            index = self._symbols[key] = symbol_index.SymbolIndex.load(*key)
+        names = params.get("names") or [params["name"]]
+        limit = params.get("limit")
+        return {"results": {name: index.lookup(name, limit) for name in names}}
+
+    def shutdown(self, params):
+        return {"stopping": True}
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+_HANDLERS = None
+
+
+def dispatch(method, params):
+    """Run one request in this process. Raises RpcError for unknown methods."""
+    global _HANDLERS
+    if _HANDLERS is None:
+        if SCRIPTS_DIR not in sys.path:
+            sys.path.insert(0, SCRIPTS_DIR)
+        _HANDLERS = Handlers()
+    handler = getattr(_HANDLERS, method, None) if not method.startswith("_") else None
+    if handler is None:
+        raise RpcError(-32601, f"Method not found: {method}")
+    return handler(params or {})
+
+
+def _invalid_request(message="Invalid Request"):
+    return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": message}}
+
+
+def handle_message(line, token=None):
+    """
+    Decode a JSON-RPC request line and return the response: a dict, a list for
+    batch requests, or None when nothing needs answering (notifications).
+    With a token, every request object must carry it as "token".
+    """
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": f"Parse error: {e}"}}
+
+    if isinstance(request, list):
+        if not request:
+            return _invalid_request("Invalid Request: empty batch")
+        responses = [r for r in (handle_request(item, token) for item in request) if r is not None]
+        return responses or None
+    return handle_request(request, token)
+
+
+def is_fatal_response(response):
+    """True if a response rejects the line as not an authorized JSON-RPC request."""
+    responses = response if isinstance(response, list) else [response]
+    return any(r is not None and r.get("error", {}).get("code") in _FATAL_CODES for r in responses)
+
+
+def is_stop_response(response):
+    """True if a response (or any response in a batch) acknowledges 'shutdown'."""
+    responses = response if isinstance(response, list) else [response]
+    return any(r is not None and r.get("result") == {"stopping": True} for r in responses)
+
+
+def handle_request(request, token=None):
+    """
+    Run one decoded JSON-RPC request object and return its response dict
+    (None for notifications). With a token, the request must carry it.
+    """
+    import contextlib
+    import hmac
+    import io
+
+    if not isinstance(request, dict):
+        return _invalid_request("Invalid Request: expected a JSON object")
+    request_id = request.get("id")
+    if token is not None:
+        supplied = request.get("token")
+        if not isinstance(supplied, str) or not hmac.compare_digest(supplied, token):
+            # Answered even for notifications: the connection is closed right after.
+            return {"jsonrpc": "2.0", "id": request_id,
+                    "error": {"code": UNAUTHORIZED, "message": "Unauthorized: missing or wrong session token"}}
+    method, params = request.get("method"), request.get("params")
+    if not isinstance(method, str):
+        response = _invalid_request("Invalid Request: 'method' must be a string")
+        response["id"] = request_id
+        return response
+    if params is not None and not isinstance(params, dict):
+        return {"jsonrpc": "2.0", "id": request_id,
+                "error": {"code": -32602, "message": "Invalid params: expected a JSON object"}}
+
+    cwd = request.get("cwd")
+    if cwd is not None and not (isinstance(cwd, str) and os.path.isabs(cwd) and os.path.isdir(cwd)):
+        return {"jsonrpc": "2.0", "id": request_id,
+                "error": {"code": -32602, "message": "Invalid params: 'cwd' must be an existing absolute directory"}}
+
+    response = {"jsonrpc": "2.0", "id": request_id}
+    captured = io.StringIO()
+    # Non-standard "cwd" member: relative paths resolve against the caller's directory.
+    previous_cwd = os.getcwd()
+    try:
+        if cwd:
+            os.chdir(cwd)
+        # Helper functions print progress; keep it off the protocol stream.
+        with contextlib.redirect_stdout(captured):
+            response["result"] = dispatch(method, params)
+    except RpcError as e:
+        response["error"] = {"code": e.code, "message": e.message}
+    except (Exception, SystemExit) as e:
+        response["error"] = {"code": -32000, "message": f"{type(e).__name__}: {e}"}
+    finally:
+        os.chdir(previous_cwd)
+    output = captured.getvalue()
+    if output and "result" in response and isinstance(response["result"], dict):
+        response["result"]["log"] = output
+    return response if request_id is not None else None
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+def serve_stdio():
+    import instrumentation as inst
+    inst.configure_logging(stream=sys.stderr)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        # Spans are only written by --profile runs; don't let them pile up here.
+        inst.TRACER.reset()
+        response = handle_message(line)
+        if response is not None:
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+            if is_stop_response(response):
+                break
+
+
+def serve_socket(address):
+    import socketserver
+    import threading
+    import instrumentation as inst
+
+    inst.configure_logging(stream=sys.stderr)
+    lock = threading.Lock()
+    token = None  # set once the server is bound
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                if not raw.strip():
+                    continue
+                # Requests are serialized: redirect_stdout and Pillow state are process-wide.
+                with lock:
+                    inst.TRACER.reset()
+                    response = handle_message(raw.decode("utf-8", errors="replace"), token)
+                    stop = is_stop_response(response)
+                if response is not None:
+                    self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                if stop:
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                if is_fatal_response(response):
+                    # Not a JSON-RPC client (e.g. an HTTP request from a browser): hang up.
+                    return
+
+    if isinstance(address, tuple):
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer(address, Handler)
+    else:
+        if os.path.exists(address):
+            # Refuse to steal a live server's socket; remove a stale one.
+            if _connect(address, timeout=0.2) is not None:
+                sys.stderr.write(f"Error: a helper server is already listening on {address}\n")
+                return 1
+            os.remove(address)
+        server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        os.chmod(address, 0o600)
+    server.daemon_threads = True
+    token_file = token_path(address)
+    token = write_token(token_file)
+
+    # Warm the expensive subsystems before accepting requests.
+    dispatch("ping", {})
+    try:
+        import generate_logo
+        generate_logo._require_pillow()
+        generate_logo.get_system_font_path()
+    except SystemExit:
+        sys.stderr.write("Warning: Pillow not installed; 'logo' requests will fail.\n")
+
+    sys.stderr.write(f"Skill helper listening on {address} (session token in {token_file})\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not isinstance(address, tuple) and os.path.exists(address):
+            os.remove(address)
+        if read_token(address) == token:
+            os.remove(token_file)
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def _connect(address, timeout=None):
+    try:
+        if isinstance(address, tuple):
+            sock = socket.create_connection(address, timeout=timeout)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(address)
+        sock.settimeout(None)
+        return sock
+    except OSError:
+        return None
+
+
+def call(method, params=None, address=None, fallback=True):
+    """
+    Send one request to the helper server and return its result.
+    If no server is reachable and fallback is true, run the request in-process.
+    Raises RpcError on error responses.
+    """
+    address = address or default_address()
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}, "cwd": os.getcwd()}
+    sock = _connect(address, timeout=0.5)
+    if sock is None:
+        if not fallback:
+            raise RpcError(-32001, f"No helper server at {address}")
+        response = handle_message(json.dumps(request))
+    else:
+        request["token"] = read_token(address)
+        with sock, sock.makefile("rwb") as stream:
+            stream.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+            stream.flush()
+            line = stream.readline()
+        if not line:
+            raise RpcError(-32002, "Helper server closed the connection")
+        response = json.loads(line)
+    if "error" in response:
+        raise RpcError(response["error"]["code"], response["error"]["message"])
+    return response["result"]
+
+
+def _parse_address(value):
+    if value is None:
+        return default_address()
+    if value.isdigit():
+        return ("127.0.0.1", int(value))
+    return value
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Long-lived helper server for skill scripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="Run the helper server")
+    serve_parser.add_argument("--socket", nargs="?", const="", default=None, metavar="PATH_OR_PORT",
+                              help="Listen on a Unix socket path or TCP port instead of stdin/stdout "
+                                   "(no value: platform default)")
+
+    call_parser = sub.add_parser("call", help="Send one request (falls back to in-process execution)")
+    call_parser.add_argument("method", help="ping, logo, mock, validate, scaffold, lookup, search, shutdown")
+    call_parser.add_argument("params", nargs="?", default="{}", help="JSON params object")
+    call_parser.add_argument("--socket", default=None, metavar="PATH_OR_PORT", help="Server address")
+    call_parser.add_argument("--no-fallback", action="store_true", help="Fail if no server is running")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        if args.socket is None:
+            serve_stdio()
+            return 0
+        try:
+            return serve_socket(_parse_address(args.socket or None))
+        except RuntimeError as e:  # unsafe runtime directory
+            sys.stderr.write(f"Error: {e}\n")
+            return 1
+
+    try:
+        params = json.loads(args.params)
+    except ValueError as e:
+        call_parser.error(f"params is not valid JSON: {e}")
+    try:
+        result = call(args.method, params, _parse_address(args.socket), not args.no_fallback)
+    except RpcError as e:
+        sys.stderr.write(f"Error: {e.message}\n")
+        return 1
+    except RuntimeError as e:
+        sys.stderr.write(f"Error: {e}\n")
+        return 1
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
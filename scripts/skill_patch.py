@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Skill Patch - upgrade an installed skill by delta instead of reinstalling it.
+
+Every build writes skills/<name>/skill_manifest.json: version, size and
+SHA-256 of each file, and for large files the rsync-style signatures of
+their fixed-size blocks (weak rolling checksum + strong hash). Because the
+signatures are in the manifest, a patch can be computed from the previous
+release's manifest alone, without its files:
+
+- new / changed small files are stored whole,
+- removed files are listed as deletions,
+- changed large files are stored as block instructions: "copy old blocks
+  i..j" or "insert these bytes" (rolling checksum match, as in rsync).
+
+The patch (.skillpatch, a zip) holds patch.json plus the payloads. Applying
+it checks the installed files against the base hashes first, rebuilds every
+touched file in a staging directory, verifies it against the target SHA-256
+and only then moves the files into place and writes the new manifest.
+
+Usage:
+    python scripts/package_skill.py --delta-from old/skill_manifest.json      # build + patch
+    python scripts/skill_patch.py create OLD_MANIFEST NEW_SKILL_DIR -o update.skillpatch
+    python scripts/skill_patch.py apply update.skillpatch [--skill-dir DIR] [--dry-run] [--verify-all]
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+import instrumentation as inst
+from skill_files import atomic_write
+
+MANIFEST_NAME = "skill_manifest.json"
+PATCH_FORMAT = 1
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Files at least this large get block signatures and may be patched by delta
+BLOCK_DIFF_MIN = 32 * 1024
+BLOCK_SIZE = 2048
+# A delta is only used when its inserted bytes stay below this share of the file
+MAX_DELTA_LITERAL_RATIO = 0.6
+STRONG_HASH_CHARS = 16
+
+_MOD = 1 << 16
+
+
+class PatchError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Manifests and block signatures
+# ---------------------------------------------------------------------------
+
+def weak_checksum(data):
+    """rsync weak checksum of a block: (a, b) packed in one int."""
+    a = b = 0
+    n = len(data)
+    for i, x in enumerate(data):
+        a += x
+        b += (n - i) * x
+    return ((b % _MOD) << 16) | (a % _MOD)
+
+
+def strong_hash(data):
+    return hashlib.sha1(data).hexdigest()[:STRONG_HASH_CHARS]
+
+
+def block_signatures(data, block_size=BLOCK_SIZE):
+    """[[weak, strong], ...] for every full block of data."""
+    return [
+        [weak_checksum(data[i:i + block_size]), strong_hash(data[i:i + block_size])]
+        for i in range(0, len(data) - block_size + 1, block_size)
+    ]
+
+
+def build_manifest(skill_dir, version):
+    """Describe every file under skill_dir (except the manifest itself)."""
+    skill_dir = Path(skill_dir)
+    files = {}
+    for path in sorted(p for p in skill_dir.rglob("*") if p.is_file()):
+        rel = path.relative_to(skill_dir).as_posix()
+        if rel == MANIFEST_NAME:
+            continue
+        data = path.read_bytes()
+        entry = {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+        if len(data) >= BLOCK_DIFF_MIN:
+            entry["block_size"] = BLOCK_SIZE
+            entry["blocks"] = block_signatures(data)
+        files[rel] = entry
+    return {"skill": skill_dir.name, "version": version, "files": files}
+
+
+def write_manifest(manifest, skill_dir):
+    path = Path(skill_dir) / MANIFEST_NAME
+    with atomic_write(path) as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+def load_manifest(path):
+    """Load a manifest from a JSON file, an installed skill dir or a build output dir."""
+    path = Path(path)
+    if path.is_dir():
+        candidates = [path / MANIFEST_NAME] + sorted(path.glob(f"skills/*/{MANIFEST_NAME}"))
+        path = next((c for c in candidates if c.is_file()), candidates[0])
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------------------------
+# Delta encoding
+# ---------------------------------------------------------------------------
+
+def compute_delta(new_data, old_blocks, block_size):
+    """
+    Express new_data as copies of old blocks plus literal bytes.
+    Returns (instructions, literal_bytes) where instructions are
+    ["c", first_block, count] or ["d", literal_offset, length].
+    """
+    table = {}
+    for index, (weak, strong) in enumerate(old_blocks):
+        table.setdefault(weak, []).append((strong, index))
+
+    instructions = []
+    literal = bytearray()
+
+    def emit_literal(chunk):
+        if not chunk:
+            return
+        if instructions and instructions[-1][0] == "d":
+            instructions[-1][2] += len(chunk)
+        else:
+            instructions.append(["d", len(literal), len(chunk)])
+        literal.extend(chunk)
+
+    def emit_copy(index):
+        last = instructions[-1] if instructions else None
+        if last and last[0] == "c" and last[1] + last[2] == index:
+            last[2] += 1
+        else:
+            instructions.append(["c", index, 1])
+
+    n = len(new_data)
+    i = literal_start = 0
+    a = b = None
+    while i + block_size <= n:
+        if a is None:
+            window = new_data[i:i + block_size]
+            a = sum(window) % _MOD
+            b = sum((block_size - k) * x for k, x in enumerate(window)) % _MOD
+        candidates = table.get((b << 16) | a)
+        if candidates:
+            strong = strong_hash(new_data[i:i + block_size])
+            match = next((index for s, index in candidates if s == strong), None)
+            if match is not None:
+                emit_literal(new_data[literal_start:i])
+                emit_copy(match)
+                i += block_size
+                literal_start = i
+                a = None
+                continue
+        if i + block_size < n:
+            out_byte, in_byte = new_data[i], new_data[i + block_size]
+            a = (a - out_byte + in_byte) % _MOD
+            b = (b - block_size * out_byte + a) % _MOD
+        i += 1
+    emit_literal(new_data[literal_start:])
+    return instructions, bytes(literal)
+
+
+def apply_delta(old_data, instructions, literal, block_size):
+    parts = []
+    for kind, start, length in instructions:
+        if kind == "c":
+            parts.append(old_data[start * block_size:(start + length) * block_size])
+        else:
+            parts.append(literal[start:start + length])
+    return b"".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Creating patches
+# ---------------------------------------------------------------------------
+
+def create_patch(old_manifest, new_skill_dir, new_manifest, output_path):
+    """
+    Write a .skillpatch turning an install described by old_manifest into
+    new_skill_dir. Returns a stats dict.
+    """
+    new_skill_dir = Path(new_skill_dir)
+    old_files, new_files = old_manifest["files"], new_manifest["files"]
+    ops = []
+    stats = {"added": 0, "replaced": 0, "delta": 0, "deleted": 0, "unchanged": 0}
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(output_path, "wb") as out, \
+            zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for rel, entry in new_files.items():
+            old = old_files.get(rel)
+            if old and old["sha256"] == entry["sha256"]:
+                stats["unchanged"] += 1
+                continue
+            data = (new_skill_dir / rel).read_bytes()
+            op = {"path": rel, "sha256": entry["sha256"], "size": entry["size"]}
+            if old:
+                op["base_sha256"] = old["sha256"]
+
+            if old and old.get("blocks") and len(data) >= BLOCK_DIFF_MIN:
+                with inst.span("block_diff") as s:
+                    instructions, literal = compute_delta(data, old["blocks"], old["block_size"])
+                    s.count("literal_bytes", len(literal))
+                if len(literal) <= MAX_DELTA_LITERAL_RATIO * len(data):
+                    op.update(op="delta", block_size=old["block_size"], instructions=instructions,
+                              data=f"delta/{rel}")
+                    zf.writestr(op["data"], literal)
+                    ops.append(op)
+                    stats["delta"] += 1
+                    inst.debug(f"  Delta: {rel} ({len(literal):,} of {len(data):,} bytes literal)", file=rel)
+                    continue
+
+            op.update(op="replace" if old else "add", data=f"files/{rel}")
+            zf.writestr(op["data"], data)
+            ops.append(op)
+            stats["replaced" if old else "added"] += 1
+            inst.debug(f"  {op['op'].capitalize()}: {rel}", file=rel)
+
+        for rel, old in old_files.items():
+            if rel not in new_files:
+                ops.append({"op": "delete", "path": rel, "base_sha256": old["sha256"]})
+                stats["deleted"] += 1
+                inst.debug(f"  Delete: {rel}", file=rel)
+
+        patch = {
+            "format": PATCH_FORMAT,
+            "skill": new_manifest["skill"],
+            "from_version": old_manifest.get("version"),
+            "to_version": new_manifest.get("version"),
+            "ops": ops,
+            "manifest": new_manifest,
+        }
+        zf.writestr("patch.json", json.dumps(patch, ensure_ascii=False, separators=(",", ":")))
+    stats["patch_bytes"] = output_path.stat().st_size
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Applying patches
+# ---------------------------------------------------------------------------
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _safe_target(skill_dir, rel):
+    target = (skill_dir / rel).resolve()
+    if skill_dir.resolve() not in target.parents:
+        raise PatchError(f"refusing path outside the skill directory: {rel}")
+    return target
+
+
+def apply_patch(patch_path, skill_dir, dry_run=False, force=False, verify_all=False):
+    """
+    Apply a .skillpatch to an installed skill directory.
+    Nothing is changed unless every touched file verifies. Returns a stats dict.
+    """
+    skill_dir = Path(skill_dir)
+    with zipfile.ZipFile(patch_path) as zf:
+        patch = json.loads(zf.read("patch.json").decode("utf-8"))
+        if patch.get("format") != PATCH_FORMAT:
+            raise PatchError(f"unsupported patch format {patch.get('format')!r}")
+
+        installed_version = None
+        if (skill_dir / MANIFEST_NAME).is_file():
+            installed_version = load_manifest(skill_dir / MANIFEST_NAME).get("version")
+        if installed_version not in (patch["from_version"], patch["to_version"]) and not force:
+            raise PatchError(f"patch upgrades {patch['from_version']} -> {patch['to_version']}, "
+                             f"but the installed version is {installed_version or 'unknown'} (use --force)")
+
+        # 1. Base check: installed files must be exactly what the patch was made against.
+        #    Files already at their target content are skipped, so an interrupted apply can be rerun.
+        pending = []
+        with inst.span("verify_base") as s:
+            for op in patch["ops"]:
+                target = _safe_target(skill_dir, op["path"])
+                current = _sha256_file(target) if target.is_file() else None
+                s.count("files")
+                if current == op.get("sha256") or (op["op"] == "delete" and current is None):
+                    continue
+                base = op.get("base_sha256")
+                if base is not None and current is None and not (force and op["op"] != "delta"):
+                    raise PatchError(f"missing installed file: {op['path']}")
+                if base is not None and current is not None and current != base and not (force and op["op"] != "delta"):
+                    raise PatchError(f"installed file was modified: {op['path']}")
+                if op["op"] == "add" and current is not None and not force:
+                    # A local file at a path the release adds would be silently replaced
+                    raise PatchError(f"file to be added already exists with different content: {op['path']} "
+                                     f"(use --force)")
+                pending.append(op)
+
+        result = {"ops": len(pending), "from_version": patch["from_version"], "to_version": patch["to_version"]}
+        if dry_run:
+            return result
+
+        # 2. Stage and verify every new file before touching the install
+        staging = skill_dir / ".skill-patch-staging"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+        staged = []
+        try:
+            with inst.span("stage") as s:
+                for i, op in enumerate(pending):
+                    if op["op"] == "delete":
+                        continue
+                    if op["op"] == "delta":
+                        old_data = (skill_dir / op["path"]).read_bytes()
+                        data = apply_delta(old_data, op["instructions"], zf.read(op["data"]), op["block_size"])
+                    else:
+                        data = zf.read(op["data"])
+                    if hashlib.sha256(data).hexdigest() != op["sha256"]:
+                        raise PatchError(f"patched content does not match its hash: {op['path']}")
+                    staged_path = staging / str(i)
+                    staged_path.write_bytes(data)
+                    staged.append((staged_path, op))
+                    s.count("files")
+                    s.count("bytes", len(data))
+
+            # 3. Commit: move staged files into place, delete removed files, write the manifest
+            with inst.span("commit") as s:
+                for staged_path, op in staged:
+                    target = skill_dir / op["path"]
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(staged_path, target)
+                    s.count("written")
+                for op in pending:
+                    if op["op"] == "delete":
+                        target = skill_dir / op["path"]
+                        if target.exists():
+                            target.unlink()
+                            s.count("deleted")
+                        parent = target.parent
+                        while parent != skill_dir and parent.is_dir() and not any(parent.iterdir()):
+                            parent.rmdir()
+                            parent = parent.parent
+                write_manifest(patch["manifest"], skill_dir)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    # 4. Verify the result against the target manifest
+    with inst.span("verify_result") as s:
+        files = patch["manifest"]["files"]
+        paths = files if verify_all else [op["path"] for op in patch["ops"] if op["op"] != "delete"]
+        bad = []
+        for rel in paths:
+            target = skill_dir / rel
+            if not target.is_file() or _sha256_file(target) != files[rel]["sha256"]:
+                bad.append(rel)
+            s.count("files")
+        if bad:
+            raise PatchError(f"verification failed for: {', '.join(bad)}")
+
+    result["verified"] = len(paths)
+    return result
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create or apply incremental skill patches")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = sub.add_parser("create", help="Create a patch from a previous manifest and a new skill folder")
+    create_parser.add_argument("old_manifest", help="Previous release skill_manifest.json (or its skill/build dir)")
+    create_parser.add_argument("new_skill_dir", help="New build: skills/<name> folder")
+    create_parser.add_argument("--output", "-o", required=True, help="Patch file to write (.skillpatch)")
+    inst.add_arguments(create_parser)
+
+    apply_parser = sub.add_parser("apply", help="Apply a patch to an installed skill in place")
+    apply_parser.add_argument("patch", help=".skillpatch file")
+    apply_parser.add_argument("--skill-dir", default=str(SCRIPTS_DIR.parent),
+                              help="Installed skill folder (default: the folder containing scripts/)")
+    apply_parser.add_argument("--dry-run", action="store_true", help="Only check that the patch applies")
+    apply_parser.add_argument("--force", action="store_true",
+                              help="Apply over a different installed version / overwrite locally modified files")
+    apply_parser.add_argument("--verify-all", action="store_true",
+                              help="After applying, hash every file of the new manifest (not just touched files)")
+    inst.add_arguments(apply_parser)
+
+    args = parser.parse_args(argv)
+    inst.setup(args)
+
+    try:
+        if args.command == "create":
+            new_skill_dir = Path(args.new_skill_dir)
+            old_manifest = load_manifest(args.old_manifest)
+            new_manifest = (load_manifest(new_skill_dir) if (new_skill_dir / MANIFEST_NAME).is_file()
+                            else build_manifest(new_skill_dir, None))
+            with inst.span("create_patch"):
+                stats = create_patch(old_manifest, new_skill_dir, new_manifest, args.output)
+            inst.info(f"✅ Patch written: {args.output} ({stats['patch_bytes']:,} bytes; "
+                      f"{stats['added']} added, {stats['replaced']} replaced, {stats['delta']} delta, "
+                      f"{stats['deleted']} deleted, {stats['unchanged']} unchanged)", **stats)
+        else:
+            with inst.span("apply_patch"):
+                result = apply_patch(args.patch, args.skill_dir, args.dry_run, args.force, args.verify_all)
+            verb = "applies cleanly" if args.dry_run else "applied and verified"
+            inst.info(f"✅ Patch {result['from_version']} -> {result['to_version']} {verb} "
+                      f"({result['ops']} operations)", **result)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile, PatchError) as e:
+        inst.error(f"❌ {e}")
+        return 1
+
+    inst.finish(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Symbol Index - precomputed lookup table of Forguncy SDK symbols in references/.
+
+The references mention hundreds of SDK attributes, base classes and JS APIs
+inside C#/JavaScript code blocks. Instead of scanning every Markdown file for
+one name, the packager extracts those symbols once into a compact table
+(assets/symbol_index.json) mapping each symbol to the files, sections and
+snippets where it appears. A lookup is a single dictionary access.
+
+What is indexed:
+    C# code   attributes ([FormulaProperty]), declared and base types,
+              interfaces (I...), override methods, non-primitive member types
+    JS code   classes and base classes, Forguncy.* API paths, this.* members
+    Prose     API list entries ("- `Name(...)`: description")
+Unlabelled code fences are classified as C# or JS by their content.
+Sample type names from the examples (My*, Test*) are skipped.
+
+Index format (JSON):
+    {
+      "version": 1,
+      "files": ["CellType/Reference_Manual/Properties_Complex.md", ...],
+      "symbols": {
+        "FormulaProperty": {
+          "count": 57,                 # all occurrences
+          "refs": [[file, line, section_offset, section, kind, snippet], ...]
+        }
+      }
+    }
+section_offset is the byte offset of the enclosing heading, so a reader can
+seek straight to the section.
+
+Usage:
+    python scripts/symbol_index.py FormulaProperty ObjectListProperty
+    python scripts/symbol_index.py --build assets/symbol_index.json [--references DIR]
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+import instrumentation as inst
+from skill_files import atomic_write, skill_path
+
+INDEX_VERSION = 1
+INDEX_NAME = "symbol_index.json"
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Locations kept per symbol (definitions first); "count" still reports all of them
+MAX_REFS = 12
+SNIPPET_LINES = 3
+SNIPPET_CHARS = 240
+
+CSHARP_LANGS = {"csharp", "cs", "c#"}
+JS_LANGS = {"javascript", "js", "typescript", "ts"}
+UNLABELLED_LANGS = {"", "auto"}
+
+# Lower rank sorts first: documented APIs, then SDK attributes and base types the
+# examples build on, then the example classes themselves and plain usages
+KIND_RANK = {"api": 0, "attribute": 1, "base": 2, "override": 3, "interface": 4,
+             "class": 5, "type": 6, "js_api": 7, "member": 8}
+
+# Placeholder names of the documentation's sample types (MyPluginServerCommand1,
+# TestCellType, ...); they are not SDK symbols and are left out of the index
+_SAMPLE_NAME = re.compile(r'^(?:My|Test)(?=[A-Z0-9_]|$)')
+
+_FENCE = re.compile(r'^\s*(```|~~~)\s*([\w#+-]*)')
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+
+_CS_HINT = re.compile(r'\b(?:public|private|protected|internal|namespace|override)\b|^\s*using\s+[\w.]+\s*;', re.M)
+_JS_HINT = re.compile(r'\b(?:function|const|let)\b|=>|\bForguncy\.|\$\(|console\.')
+
+_CS_ATTRIBUTE_LIST = re.compile(r'^\s*\[([A-Z][^\]]*)\]')
+_CS_ATTRIBUTE = re.compile(r'(?:^|,)\s*([A-Z]\w*)')
+_CS_TYPE_DECL = re.compile(r'\b(class|interface|enum|struct|record)\s+([A-Z]\w*)(?:<[^>{]*>)?(?:\s*:\s*([^{\n/]+))?')
+_CS_OVERRIDE = re.compile(r'\boverride\s+[\w<>,\[\]\s.?]+?\s+([A-Z]\w*)\s*\(')
+_CS_MEMBER_TYPE = re.compile(
+    r'\b(?:public|protected|internal|private)\s+(?:(?:static|virtual|override|async|readonly|abstract|sealed|new)\s+)*'
+    r'([A-Z][\w.]*)(?:<([^>()]*)>)?\??\s+[A-Z]\w*\s*[({=;]')
+_CS_INTERFACE = re.compile(r'\b(I[A-Z][a-z]\w*)\b')
+_JS_CLASS = re.compile(r'\bclass\s+([A-Za-z_$][\w$]*)(?:\s+extends\s+([\w$.]+))?')
+_JS_FORGUNCY = re.compile(r'\bForguncy(?:\.[A-Za-z_$][\w$]*)+')
+_JS_THIS_MEMBER = re.compile(r'\bthis\.([A-Za-z_$][\w$]*)\s*\(')
+_API_ITEM = re.compile(r'^\s*[-*]\s+((?:`[^`]+`\s*(?:,\s*|/\s*)?)+)\s*[:：]')
+_API_NAME = re.compile(r'^\[?\s*(?:await\s+)?(?:(?:this|context)\.)?([A-Za-z_][\w]*(?:\.[A-Za-z_]\w*)*)')
+
+_PRIMITIVES = {
+    "String", "Object", "Boolean", "Int32", "Int64", "Double", "Task", "Void", "List", "Dictionary",
+    "IEnumerable", "Array", "DateTime", "Guid", "Type", "Exception",
+}
+
+
+def default_references_dir():
+    return skill_path("references")
+
+
+def default_index_path():
+    """Prebuilt index of an installed skill (None in the builder repository)."""
+    path = SCRIPTS_DIR.parent / "assets" / INDEX_NAME
+    return path if path.is_file() else None
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def classify_block(lang, code):
+    """Return "cs", "js" or None for a fenced block."""
+    lang = lang.lower()
+    if lang in CSHARP_LANGS:
+        return "cs"
+    if lang in JS_LANGS:
+        return "js"
+    if lang not in UNLABELLED_LANGS:
+        return None
+    if _CS_HINT.search(code):
+        return "cs"
+    if _JS_HINT.search(code):
+        return "js"
+    return None
+
+
+def csharp_symbols(line):
+    """Yield (name, kind) pairs found on one line of C# code."""
+    m = _CS_ATTRIBUTE_LIST.match(line)
+    if m:
+        for attr in _CS_ATTRIBUTE.findall(re.sub(r'\([^()]*\)', '', m.group(1))):
+            yield (attr[:-len("Attribute")] if attr.endswith("Attribute") and attr != "Attribute" else attr), "attribute"
+        return
+    for m in _CS_TYPE_DECL.finditer(line):
+        yield m.group(2), "class"
+        for base in (m.group(3) or "").split(","):
+            base = re.sub(r'<.*', '', base).strip()
+            if re.fullmatch(r'[A-Z][\w.]*', base) and not base.startswith("where"):
+                yield base, "base"
+    for m in _CS_OVERRIDE.finditer(line):
+        yield m.group(1), "override"
+    for m in _CS_MEMBER_TYPE.finditer(line):
+        names = [m.group(1)] + re.findall(r'[A-Z]\w*', m.group(2) or "")
+        for name in names:
+            if name.split(".")[-1] not in _PRIMITIVES:
+                yield name, "type"
+    for m in _CS_INTERFACE.finditer(line):
+        if m.group(1) not in _PRIMITIVES:
+            yield m.group(1), "interface"
+
+
+def js_symbols(line):
+    """Yield (name, kind) pairs found on one line of JavaScript code."""
+    for m in _JS_CLASS.finditer(line):
+        yield m.group(1), "class"
+        if m.group(2):
+            yield m.group(2), "base"
+    for m in _JS_FORGUNCY.finditer(line):
+        yield m.group(0), "js_api"
+    for m in _JS_THIS_MEMBER.finditer(line):
+        yield m.group(1), "member"
+
+
+def api_list_symbols(line):
+    """Yield (name, kind) pairs from a '- `Name(...)`: description' list entry."""
+    m = _API_ITEM.match(line)
+    if not m:
+        return
+    for span in re.findall(r'`([^`]+)`', m.group(1)):
+        name = _API_NAME.match(span.strip())
+        if name:
+            yield name.group(1), "api"
+
+
+def _snippet(lines, start):
+    picked = []
+    for line in lines[start:]:
+        if not line.strip():
+            if picked:
+                break
+            continue
+        picked.append(line.strip())
+        if len(picked) == SNIPPET_LINES:
+            break
+    text = "\n".join(picked)
+    return text if len(text) <= SNIPPET_CHARS else text[:SNIPPET_CHARS - 1] + "…"
+
+
+def scan_file(path):
+    """
+    Yield (name, kind, line_number, section_offset, section, snippet) for one Markdown file.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+
+    headings = []  # [(level, text)]
+    section, section_offset = "", 0
+    offset = 0
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        line_offset = offset
+        offset += len(line.encode("utf-8")) + 1
+        fence = _FENCE.match(line)
+        if fence:
+            # Collect the block body
+            marker, lang = fence.group(1), fence.group(2)
+            body_start = i + 1
+            j = body_start
+            while j < len(lines) and not lines[j].lstrip().startswith(marker):
+                offset += len(lines[j].encode("utf-8")) + 1
+                j += 1
+            if j < len(lines):
+                offset += len(lines[j].encode("utf-8")) + 1
+            body = lines[body_start:j]
+            extract = {"cs": csharp_symbols, "js": js_symbols}.get(classify_block(lang, "\n".join(body)))
+            if extract:
+                for k, code_line in enumerate(body):
+                    seen = set()
+                    for name, kind in extract(code_line):
+                        if (name, kind) in seen:
+                            continue
+                        seen.add((name, kind))
+                        yield name, kind, body_start + k + 1, section_offset, section, _snippet(body, k)
+            i = j + 1
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            headings = [h for h in headings if h[0] < level] + [(level, heading.group(2))]
+            section = " > ".join(text for _, text in headings[-2:])
+            section_offset = line_offset
+        else:
+            for name, kind in api_list_symbols(line):
+                yield name, kind, i + 1, section_offset, section, _snippet(lines, i)
+        i += 1
+
+
+def build_index(references_dir):
+    """Scan every Markdown file under references_dir and return the index dict."""
+    references_dir = Path(references_dir)
+    files = sorted(p for p in references_dir.rglob("*.md") if p.is_file())
+    file_table = [p.relative_to(references_dir).as_posix() for p in files]
+
+    occurrences = {}
+    for file_id, path in enumerate(files):
+        seen = set()
+        for name, kind, line, section_offset, section, snippet in scan_file(path):
+            if _SAMPLE_NAME.match(name.rsplit(".", 1)[-1]):
+                continue
+            entry = occurrences.setdefault(name, {"count": 0, "refs": []})
+            entry["count"] += 1
+            # One location per symbol, kind and section is enough to find it
+            key = (name, kind, section_offset)
+            if key in seen:
+                continue
+            seen.add(key)
+            entry["refs"].append([file_id, line, section_offset, section, kind, snippet])
+
+    for entry in occurrences.values():
+        entry["refs"].sort(key=lambda r: (KIND_RANK.get(r[4], 99), r[0], r[1]))
+        del entry["refs"][MAX_REFS:]
+
+    return {
+        "version": INDEX_VERSION,
+        "files": file_table,
+        "symbols": dict(sorted(occurrences.items())),
+    }
+
+
+def write_index(index, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path) as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Lookup
+# ---------------------------------------------------------------------------
+
+class SymbolIndex:
+    """Loaded index with exact and case-insensitive O(1) lookup."""
+
+    def __init__(self, index, references_dir=None):
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"unsupported symbol index version {index.get('version')!r}")
+        self.files = index["files"]
+        self.symbols = index["symbols"]
+        self.references_dir = Path(references_dir) if references_dir else None
+        self._folded = {}
+        for name in self.symbols:
+            self._folded.setdefault(name.lower(), name)
+        # Dotted JS paths are also reachable by their last segment (registerCommand)
+        for name in self.symbols:
+            if "." in name:
+                self._folded.setdefault(name.rsplit(".", 1)[1].lower(), name)
+
+    @classmethod
+    def load(cls, path=None, references_dir=None):
+        """Load a prebuilt index, or build one in memory from references_dir."""
+        path = path or default_index_path()
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            return cls(index, references_dir or Path(path).resolve().parent.parent / "references")
+        references_dir = references_dir or default_references_dir()
+        return cls(build_index(references_dir), references_dir)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def resolve(self, name):
+        """Canonical symbol name for name (exact, case-insensitive, '...Attribute' or '[Name]'), or None."""
+        name = name.strip().strip("[]")
+        candidates = [name]
+        if name.endswith("Attribute"):
+            candidates.append(name[:-len("Attribute")])
+        for candidate in candidates:
+            if candidate in self.symbols:
+                return candidate
+            folded = self._folded.get(candidate.lower())
+            if folded:
+                return folded
+        return None
+
+    def lookup(self, name, limit=None):
+        """Return {"symbol", "count", "refs": [{file, line, section_offset, section, kind, snippet}]} or None."""
+        symbol = self.resolve(name)
+        if symbol is None:
+            return None
+        entry = self.symbols[symbol]
+        refs = entry["refs"][:limit] if limit else entry["refs"]
+        return {
+            "symbol": symbol,
+            "count": entry["count"],
+            "refs": [
+                {"file": self.files[f], "line": line, "section_offset": offset,
+                 "section": section, "kind": kind, "snippet": snippet}
+                for f, line, offset, section, kind, snippet in refs
+            ],
+        }
+
+    def suggest(self, name, limit=10):
+        """Symbols containing name (linear scan, only used when lookup misses)."""
+        needle = name.strip().strip("[]").lower()
+        return [s for s in self.symbols if needle in s.lower()][:limit]
+
+
+def print_result(result):
+    print(f"🔎 {result['symbol']} ({result['count']} occurrence(s))")
+    for ref in result["refs"]:
+        print(f"\n  {ref['file']}:{ref['line']}  [{ref['kind']}]  {ref['section']}")
+        for line in ref["snippet"].splitlines():
+            print(f"      {line}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Look up Forguncy SDK symbols in the references")
+    parser.add_argument("names", nargs="*", help="Symbols to look up (e.g. FormulaProperty, ServerCommand)")
+    parser.add_argument("--index", help="Prebuilt index (default: the skill's assets/symbol_index.json)")
+    parser.add_argument("--references", help="References directory (used when no prebuilt index exists)")
+    parser.add_argument("--build", metavar="PATH", help="Build the index from the references and write it to PATH")
+    parser.add_argument("--limit", type=int, default=5, help="Locations to show per symbol (0 = all)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    inst.add_arguments(parser)
+    args = parser.parse_args(argv)
+    inst.setup(args)
+
+    if args.build:
+        references = args.references or default_references_dir()
+        with inst.span("build_index") as s:
+            index = build_index(references)
+            write_index(index, args.build)
+            s.count("files", len(index["files"]))
+            s.count("symbols", len(index["symbols"]))
+        inst.info(f"✅ Indexed {len(index['symbols'])} symbols from {len(index['files'])} files: {args.build}")
+        inst.finish(args)
+        return 0
+
+    if not args.names:
+        parser.error("give at least one symbol name, or --build PATH")
+
+    with inst.span("load_index"):
+        index = SymbolIndex.load(args.index, args.references)
+
+    results, missing = [], []
+    for name in args.names:
+        result = index.lookup(name, args.limit or None)
+        if result is None:
+            missing.append(name)
+        else:
+            results.append(result)
+
+    if args.json:
+        print(json.dumps({"results": results, "missing": missing}, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print_result(result)
+            print()
+        for name in missing:
+            hint = index.suggest(name)
+            inst.warning(f"⚠️ No symbol '{name}'" + (f" (similar: {', '.join(hint)})" if hint else ""))
+    inst.finish(args)
+    return 0 if not missing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Template Engine - renders plugin scaffolds from assets/templates.
+
+The code templates are plain, compilable examples (MyPluginNamespace,
+MyServerCommand, ...). assets/templates/scaffold.json declares which
+literal tokens in each template are placeholders and how scaffold items
+map to output files. Each template is parsed once into a compiled form
+(literal segments, placeholders and conditional blocks) and cached by the
+hash of its content, so a multi-file scaffold is rendered in one call and
+written through a single batched writer.
+
+Conditional blocks use whole-line markers in the template's comment syntax;
+the marker lines are dropped from the output:
+    // @if icon        (also "# @if", "<!-- @if icon -->", "@if !icon")
+    ...
+    // @else
+    ...
+    // @endif
+
+Scaffold spec (JSON):
+{
+    "namespace": "AcmePlugin",
+    "icon": true,
+    "items": [
+        { "kind": "Project" },
+        { "kind": "ServerCommand", "class_name": "SendMail", "display_name": "发送邮件" },
+        { "kind": "CellType", "class_name": "Chart" }
+    ]
+}
+
+Usage:
+    python scripts/template_engine.py spec.json --output ./MyPlugin [--dry-run] [--force]
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+import instrumentation as inst
+from skill_files import atomic_write, skill_path
+
+MANIFEST_NAME = "scaffold.json"
+
+_MARKER = re.compile(r'^\s*(?://|#|<!--)\s*@(if|else|endif)\b\s*(!?\w+)?\s*(?:-->)?\s*$')
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def default_templates_dir():
+    return skill_path("assets", "templates")
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+# Compiled nodes:
+#   str                         literal text
+#   ("var", name)               placeholder
+#   ("if", name, negate, then_nodes, else_nodes)
+
+def compile_template(text, tokens):
+    """
+    Compile template text. tokens maps literal strings in the template to
+    variable names; they are matched on word boundaries, longest first.
+    """
+    token_re = None
+    if tokens:
+        alternatives = sorted(tokens, key=len, reverse=True)
+        token_re = re.compile("|".join(rf"(?<!\w){re.escape(t)}(?!\w)" for t in alternatives))
+
+    root = []
+    stack = [(None, root)]  # (if-node or None, list being filled)
+    pending = []  # literal lines not yet tokenized
+
+    def flush():
+        if not pending:
+            return
+        chunk = "".join(pending)
+        pending.clear()
+        target = stack[-1][1]
+        if token_re is None:
+            target.append(chunk)
+            return
+        pos = 0
+        for m in token_re.finditer(chunk):
+            if m.start() > pos:
+                target.append(chunk[pos:m.start()])
+            target.append(("var", tokens[m.group(0)]))
+            pos = m.end()
+        if pos < len(chunk):
+            target.append(chunk[pos:])
+
+    for number, line in enumerate(text.splitlines(keepends=True), 1):
+        m = _MARKER.match(line)
+        if not m:
+            pending.append(line)
+            continue
+        flush()
+        keyword, arg = m.group(1), m.group(2)
+        if keyword == "if":
+            if not arg:
+                raise TemplateError(f"line {number}: @if needs a variable name")
+            node = ["if", arg.lstrip("!"), arg.startswith("!"), [], []]
+            stack[-1][1].append(node)
+            stack.append((node, node[3]))
+        elif keyword == "else":
+            node = stack[-1][0]
+            if node is None or stack[-1][1] is node[4]:
+                raise TemplateError(f"line {number}: @else without @if")
+            stack[-1] = (node, node[4])
+        else:
+            if stack[-1][0] is None:
+                raise TemplateError(f"line {number}: @endif without @if")
+            stack.pop()
+    flush()
+    if len(stack) != 1:
+        raise TemplateError("unterminated @if block")
+    return _freeze(root)
+
+
+def _freeze(nodes):
+    out = []
+    for node in nodes:
+        if isinstance(node, list):
+            out.append(("if", node[1], node[2], _freeze(node[3]), _freeze(node[4])))
+        else:
+            out.append(node)
+    return tuple(out)
+
+
+def render_compiled(nodes, values, parts=None):
+    """Render compiled nodes with values; returns the output string."""
+    top = parts is None
+    if top:
+        parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(node)
+        elif node[0] == "var":
+            try:
+                parts.append(values[node[1]])
+            except KeyError:
+                raise TemplateError(f"missing value for placeholder '{node[1]}'") from None
+        else:
+            _, name, negate, then_nodes, else_nodes = node
+            render_compiled(then_nodes if bool(values.get(name)) != negate else else_nodes, values, parts)
+    return "".join(parts) if top else None
+
+
+class TemplateCache:
+    """Compiled templates keyed by content hash (and token map)."""
+
+    def __init__(self):
+        self._compiled = {}
+        self.stats = {"hits": 0, "compiled": 0}
+
+    def load(self, path, tokens):
+        data = Path(path).read_bytes()
+        key = (hashlib.sha256(data).hexdigest(), tuple(sorted(tokens.items())))
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = compile_template(data.decode("utf-8"), tokens)
+            self._compiled[key] = compiled
+            self.stats["compiled"] += 1
+        else:
+            self.stats["hits"] += 1
+        return compiled
+
+
+_CACHE = TemplateCache()
+
+
+# ---------------------------------------------------------------------------
+# Scaffold rendering
+# ---------------------------------------------------------------------------
+
+_ESCAPES = {
+    None: lambda v: v,
+    "csharp_string": lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\r", "\\r").replace("\n", "\\n"),
+    "xml": lambda v: v.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;"),
+}
+
+
+def load_manifest(templates_dir):
+    path = Path(templates_dir) / MANIFEST_NAME
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_values(manifest, spec, item):
+    """Merge spec-level and item-level values, apply defaults, validate and escape."""
+    variables = manifest["variables"]
+    raw = {k: v for k, v in spec.items() if k != "items"}
+    raw.update({k: v for k, v in item.items() if k not in ("kind", "output")})
+    if isinstance(raw.get("namespace"), str):
+        raw.setdefault("namespace_lower", raw["namespace"].lower())
+
+    # Defaults may reference other values ("{class_name}"); resolve until stable
+    for _ in range(len(variables)):
+        changed = False
+        for name, meta in variables.items():
+            if name in raw or "default" not in meta:
+                continue
+            default = meta["default"]
+            if isinstance(default, str):
+                try:
+                    default = default.format(**raw)
+                except KeyError:
+                    continue
+            raw[name] = default
+            changed = True
+        if not changed:
+            break
+
+    values = {}
+    for name, value in raw.items():
+        meta = variables.get(name, {})
+        if meta.get("identifier") and not (isinstance(value, str) and _IDENTIFIER.match(value)):
+            raise TemplateError(f"'{name}' must be a valid identifier, got {value!r}")
+        values[name] = _ESCAPES[meta.get("escape")](value) if isinstance(value, str) else value
+    for name, meta in variables.items():
+        if meta.get("required") and name not in values:
+            raise TemplateError(f"'{name}' is required")
+    return values, raw
+
+
+def render_scaffold(spec, templates_dir=None, cache=None):
+    """
+    Render every file of a scaffold spec in memory.
+    Returns a list of (relative output path, content).
+    """
+    templates_dir = Path(templates_dir or default_templates_dir())
+    cache = cache or _CACHE
+    manifest = load_manifest(templates_dir)
+    shared_tokens = {meta["token"]: name for name, meta in manifest["variables"].items() if "token" in meta}
+
+    outputs = []
+    seen = {}
+    for index, item in enumerate(spec.get("items", [])):
+        kind = item.get("kind")
+        entries = manifest["kinds"].get(kind)
+        if entries is None:
+            raise TemplateError(f"items[{index}]: unknown kind {kind!r} (known: {', '.join(manifest['kinds'])})")
+        values, raw = resolve_values(manifest, spec, item)
+        for entry in entries:
+            tokens = dict(shared_tokens)
+            tokens.update(entry.get("tokens", {}))
+            missing = sorted({name for name in tokens.values() if name not in values})
+            if missing:
+                raise TemplateError(f"items[{index}] ({kind}): missing {', '.join(missing)}")
+            compiled = cache.load(templates_dir / entry["template"], tokens)
+            content = render_compiled(compiled, values)
+            output = item.get("output") if len(entries) == 1 and item.get("output") else entry["output"].format(**raw)
+            output = Path(output).as_posix()
+            if output in seen:
+                raise TemplateError(f"items[{index}] ({kind}): output {output} already produced by items[{seen[output]}]")
+            seen[output] = index
+            outputs.append((output, content))
+    return outputs
+
+
+class BatchWriter:
+    """Collects rendered files and writes them in one pass (directories created once)."""
+
+    def __init__(self, root, overwrite=False):
+        self.root = Path(root)
+        self.overwrite = overwrite
+        self.files = []
+
+    def add(self, rel_path, content):
+        self.files.append((rel_path, content))
+
+    def conflicts(self):
+        """Existing files whose content would change."""
+        found = []
+        for rel_path, content in self.files:
+            path = self.root / rel_path
+            if path.exists() and path.read_text(encoding="utf-8") != content:
+                found.append(rel_path)
+        return found
+
+    def commit(self):
+        """Write all files. Returns (written, unchanged) relative paths."""
+        if not self.overwrite:
+            conflicts = self.conflicts()
+            if conflicts:
+                raise TemplateError(f"refusing to overwrite existing files: {', '.join(conflicts)} (use --force)")
+        for directory in sorted({(self.root / rel).parent for rel, _ in self.files}):
+            directory.mkdir(parents=True, exist_ok=True)
+        written, unchanged = [], []
+        for rel_path, content in self.files:
+            path = self.root / rel_path
+            data = content.encode("utf-8")
+            if path.exists() and path.read_bytes() == data:
+                unchanged.append(rel_path)
+                continue
+            with atomic_write(path, "wb") as f:
+                f.write(data)
+            written.append(rel_path)
+        return written, unchanged
+
+
+def scaffold(spec, output_dir, templates_dir=None, overwrite=False, dry_run=False):
+    """Render and write a scaffold. Returns the list of written relative paths."""
+    with inst.span("render") as s:
+        outputs = render_scaffold(spec, templates_dir)
+        s.count("files", len(outputs))
+    writer = BatchWriter(output_dir, overwrite)
+    for rel_path, content in outputs:
+        writer.add(rel_path, content)
+    if dry_run:
+        return [rel for rel, _ in outputs]
+    with inst.span("write") as s:
+        written, unchanged = writer.commit()
+        s.count("files", len(written))
+        s.count("bytes", sum(len(c.encode("utf-8")) for rel, c in outputs if rel in written))
+    for rel in written:
+        inst.debug(f"  Wrote: {rel}", file=rel)
+    if unchanged:
+        inst.info(f"  {len(unchanged)} file(s) already up to date")
+    return written
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render a plugin scaffold from assets/templates")
+    parser.add_argument("spec", help="Scaffold spec JSON file ('-' for stdin)")
+    parser.add_argument("--output", "-o", default=".", help="Plugin project directory")
+    parser.add_argument("--templates", help="Templates directory (default: the skill's assets/templates)")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing files that differ")
+    parser.add_argument("--dry-run", action="store_true", help="List the files that would be written")
+    inst.add_arguments(parser)
+    args = parser.parse_args(argv)
+    inst.setup(args)
+
+    try:
+        if args.spec == "-":
+            spec = json.load(sys.stdin)
+        else:
+            with open(args.spec, "r", encoding="utf-8") as f:
+                spec = json.load(f)
+        files = scaffold(spec, args.output, args.templates, args.force, args.dry_run)
+    except (OSError, json.JSONDecodeError, TemplateError) as e:
+        inst.error(f"❌ Scaffold failed: {e}")
+        return 1
+
+    verb = "Would write" if args.dry_run else "Wrote"
+    inst.info(f"✅ {verb} {len(files)} file(s) to {Path(args.output).resolve()}")
+    if args.dry_run:
+        for rel in files:
+            inst.info(f"  {rel}")
+    inst.finish(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())